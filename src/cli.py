@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+打卡机命令行入口
+
+不导入 Tk 和界面模块，适合在登录脚本、定时任务和无图形界面的主机上使用：
+
+    python cli.py punch in|out [--at TIME] [--notes TEXT]
+    python cli.py stats month YYYY-MM
+    python cli.py export [records|daily|monthly] [--start YYYY-MM-DD] [--end YYYY-MM-DD]
+                         [--format csv|jsonl] [-o FILE] [--gzip]
+"""
+import argparse
+import gzip
+import sys
+from datetime import date
+
+from core.clock_manager import ClockManager
+from core.database import DatabaseManager, DEFAULT_EMPLOYEE
+from core.timestamp import parse_date
+
+
+def punch(clock_manager: ClockManager, args) -> int:
+    """上班或下班打卡，--at 指定时间时按自定义时间打卡"""
+    notes = args.notes if args.notes is not None else "命令行打卡"
+    if args.at:
+        at = args.at.strip()
+        if ' ' not in at:
+            # 只有时间部分时按今天的日期打卡
+            at = f"{date.today():%Y-%m-%d} {at}"
+        change = clock_manager.custom_clock(at, args.type, notes)
+    elif args.type == "in":
+        change = clock_manager.clock_in(notes)
+    else:
+        change = clock_manager.clock_out(notes)
+    if change is None:
+        print("打卡失败！", file=sys.stderr)
+        return 1
+    print(f"{change.date} 打卡成功，当天工时 {change.after.hours:.2f} 小时")
+    return 0
+
+
+def stats_month(clock_manager: ClockManager, args) -> int:
+    """输出某月的月度统计和每日工时"""
+    try:
+        year, month = (int(part) for part in args.month.split('-'))
+        if not 1 <= month <= 12:
+            raise ValueError
+    except ValueError:
+        print(f"月份格式不正确: {args.month}，请使用 YYYY-MM 格式", file=sys.stderr)
+        return 2
+    # 不传休息时间段，使用数据库中保存的配置，避免命令行统计改动界面的设置
+    stats = clock_manager.calculate_monthly_statistics(year, month)
+    print(f"{year}年{month}月")
+    print(f"工作天数: {stats['total_days']}")
+    print(f"总工时: {stats['total_hours']:.2f}小时")
+    print(f"平均工时: {stats['average_hours']:.2f}小时")
+    for day in stats['work_days']:
+        print(f"{day['date']}  {day['first_in'] or '无记录'}  {day['last_out'] or '无记录'}  {day['hours']:.2f}")
+    return 0
+
+
+def export(clock_manager: ClockManager, args) -> int:
+    """把 [start, end) 范围内的记录或统计流式导出，未指定文件时写到标准输出"""
+    # 先检查日期，避免写出表头后才发现参数错误
+    dates = []
+    for value in (args.start, args.end):
+        try:
+            dates.append(parse_date(value) if value else None)
+        except ValueError:
+            print(f"日期格式不正确: {value}，请使用 YYYY-MM-DD 格式", file=sys.stderr)
+            return 2
+    start, end = dates
+    if args.gzip and not args.output:
+        # 压缩后写到标准输出的二进制流，便于通过管道传给其他程序
+        with gzip.open(sys.stdout.buffer, 'wt', encoding='utf-8', newline='') as stream:
+            clock_manager.export(stream, args.kind, args.format, start, end)
+        return 0
+    count = clock_manager.export(args.output or sys.stdout, args.kind, args.format, start, end,
+                                 compress=args.gzip or None)
+    if args.output:
+        print(f"已导出 {count} 行到 {args.output}")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """命令行参数定义"""
+    parser = argparse.ArgumentParser(prog="cli.py", description="打卡机命令行工具")
+    parser.add_argument('--db', default="data/clock_in.db", help="数据库文件路径")
+    parser.add_argument('--employee', default=DEFAULT_EMPLOYEE, help="员工编号")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    punch_parser = commands.add_parser('punch', help="打卡")
+    punch_parser.add_argument('type', choices=("in", "out"), help="in 上班，out 下班")
+    punch_parser.add_argument('--at', help="打卡时间，YYYY-MM-DD HH:MM:SS 或 HH:MM:SS，默认为当前时间")
+    punch_parser.add_argument('--notes', help="备注")
+    punch_parser.set_defaults(handler=punch)
+
+    stats_parser = commands.add_parser('stats', help="统计")
+    stats_commands = stats_parser.add_subparsers(dest='period', required=True)
+    month_parser = stats_commands.add_parser('month', help="月度统计")
+    month_parser.add_argument('month', help="YYYY-MM")
+    month_parser.set_defaults(handler=stats_month)
+
+    export_parser = commands.add_parser('export', help="导出打卡记录或统计")
+    export_parser.add_argument('kind', nargs='?', default='records', choices=("records", "daily", "monthly"),
+                               help="records 打卡记录（默认），daily 每日统计，monthly 月度统计")
+    export_parser.add_argument('--start', help="开始日期（含），YYYY-MM-DD")
+    export_parser.add_argument('--end', help="结束日期（不含），YYYY-MM-DD")
+    export_parser.add_argument('--format', default='csv', choices=("csv", "jsonl"), help="输出格式，默认 csv")
+    export_parser.add_argument('-o', '--output', help="输出文件，默认写到标准输出；以 .gz 结尾时压缩")
+    export_parser.add_argument('--gzip', action='store_true', help="用 gzip 压缩输出（文件或标准输出）")
+    export_parser.set_defaults(handler=export)
+    return parser
+
+
+def main(argv=None) -> int:
+    """主函数，返回进程退出码"""
+    args = build_parser().parse_args(argv)
+    try:
+        clock_manager = ClockManager(args.employee, DatabaseManager(args.db))
+        return args.handler(clock_manager, args)
+    except Exception as e:
+        print(f"执行失败: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
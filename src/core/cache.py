@@ -0,0 +1,49 @@
+"""
+有界 LRU 缓存
+"""
+from collections import OrderedDict
+
+
+class LRUCache:
+    """按最近使用淘汰的有界缓存，带命中统计"""
+
+    _MISSING = object()
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def get(self, key, default=None):
+        """取值并记录命中情况"""
+        value = self._data.get(key, self._MISSING)
+        if value is self._MISSING:
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """写入缓存，超出容量时淘汰最久未使用的项"""
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        """清空缓存（保留命中统计）"""
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def info(self) -> dict:
+        """缓存统计信息"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._data),
+            'maxsize': self.maxsize
+        }
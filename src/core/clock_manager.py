@@ -1,47 +1,149 @@
 """
 打卡管理逻辑
 """
-from datetime import datetime, timedelta
-from .database import DatabaseManager
+import sys
+import threading
+from datetime import date, datetime, timedelta
+from typing import Optional
+from .cache import LRUCache
+from .database import DatabaseManager, DEFAULT_EMPLOYEE
+from .record import ClockRecord, DailySummary, DayChange
+from .timestamp import (SECONDS_PER_DAY, parse_timestamp, datetime_to_ts, date_to_day, day_to_date,
+                        format_day, now_ts)
+from .today import TodayState
+from .worktime import (RestSchedule, rest_overlap_seconds, summarize_day, summarize_records,
+                       iter_daily_work, iter_shift_work, monthly_statistics, monthly_remark)
 
 class ClockManager:
-    def __init__(self):
-        self.db = DatabaseManager()
+    # 每日工时缓存和月度统计缓存的容量
+    DAILY_CACHE_SIZE = 2048
+    MONTHLY_CACHE_SIZE = 64
+    # 按班次统计时允许的最长班次（小时）
+    MAX_SHIFT_HOURS = 16
+
+    def __init__(self, employee_id: str = DEFAULT_EMPLOYEE, db: DatabaseManager = None):
+        # 打卡和统计都针对 employee_id 指定的员工；多个员工可共用同一个 DatabaseManager
+        self.employee_id = employee_id
+        self.db = db or DatabaseManager()
+        # 最后一次打卡记录缓存，键为打卡类型；尚未加载的类型不在字典中。
+        # 数据库的数据版本变化后（包括其他进程的打卡）整体丢弃
+        self._last_clock = {}
+        self._last_clock_generation = None
+        # 工时计算缓存：键中包含当天或当月的数据版本（DatabaseManager.day_version/month_version），
+        # 打卡只使被打卡的那一天和那个月的缓存项失效；批量导入、休息时间段重建和其他进程的
+        # 写入影响范围未知，使全部缓存项失效
+        self._daily_cache = LRUCache(self.DAILY_CACHE_SIZE)
+        self._monthly_cache = LRUCache(self.MONTHLY_CACHE_SIZE)
+        # 当天打卡状态，首次访问时载入，之后由打卡操作原地更新。打卡（后台线程）和计时
+        # （界面线程）可能同时访问，替换和更新都在 _today_lock 下进行，锁内不做数据库读写；
+        # _today_writes 为打卡次数，载入期间有新的打卡时重新载入
+        self._today = None
+        self._today_lock = threading.Lock()
+        self._today_writes = 0
+    
+    def _add_record(self, record_time: str, record_type: str, notes: str = ""):
+        """写入打卡记录并同步当天状态，返回当天汇总的变化（DayChange），失败时返回 None"""
+        change = self.db.add_clock_record(record_time, record_type, notes, self.employee_id)
+        if change is None:
+            return None
+        record_ts = parse_timestamp(record_time)
+        record = ClockRecord(record_ts, record_ts // SECONDS_PER_DAY, record_type, notes)
+        with self._today_lock:
+            self._today_writes += 1
+            if self._today is not None:
+                self._today.apply(record)
+        return change
+    
+    def import_records(self, records) -> int:
+        """批量导入打卡记录，返回写入条数"""
+        count = self.db.add_clock_records_bulk(records, self.employee_id)
+        if count:
+            with self._today_lock:
+                self._today_writes += 1
+                self._today = None
+        return count
+    
+    def cache_info(self) -> dict:
+        """工时缓存的命中统计"""
+        return {
+            'daily': self._daily_cache.info(),
+            'monthly': self._monthly_cache.info()
+        }
+    
+    def _get_last_clock(self, record_type: str):
+        """从缓存获取最后一次打卡记录，数据库有新的写入时重新查询"""
+        generation = self.db.data_generation()
+        if generation != self._last_clock_generation:
+            self._last_clock.clear()
+            self._last_clock_generation = generation
+        if record_type not in self._last_clock:
+            self._last_clock[record_type] = self.db.get_last_clock_time(record_type, self.employee_id)
+        return self._last_clock[record_type]
     
-    def clock_in(self, notes: str = "") -> bool:
-        """上班打卡"""
+    def clock_in(self, notes: str = "") -> Optional[DayChange]:
+        """上班打卡，返回当天汇总的变化，失败时返回 None"""
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        return self.db.add_clock_record(current_time, "in", notes)
+        return self._add_record(current_time, "in", notes)
     
-    def clock_out(self, notes: str = "") -> bool:
-        """下班打卡"""
+    def clock_out(self, notes: str = "") -> Optional[DayChange]:
+        """下班打卡，返回当天汇总的变化，失败时返回 None"""
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        return self.db.add_clock_record(current_time, "out", notes)
+        return self._add_record(current_time, "out", notes)
     
-    def custom_clock(self, custom_time: str, record_type: str, notes: str = "") -> bool:
-        """自定义时间打卡"""
+    def custom_clock(self, custom_time: str, record_type: str, notes: str = "") -> Optional[DayChange]:
+        """自定义时间打卡，返回当天汇总的变化，失败时返回 None"""
         try:
             if record_type == "in":
-                return self.db.add_clock_record(custom_time, "in", notes)
+                return self._add_record(custom_time, "in", notes)
             else:
-                return self.db.add_clock_record(custom_time, "out", notes)
+                return self._add_record(custom_time, "out", notes)
         except ValueError:
-            return False
+            return None
     
     def get_last_clock_in(self):
         """获取最后一次上班打卡时间"""
-        return self.db.get_last_clock_time("in")
+        return self._get_last_clock("in")
     
     def get_last_clock_out(self):
         """获取最后一次下班打卡时间"""
-        return self.db.get_last_clock_time("out")
+        return self._get_last_clock("out")
+    
+    def get_today_state(self, reload: bool = False) -> TodayState:
+        """获取当天打卡状态，首次访问、跨过午夜或 reload 为 True 时从数据库载入当天记录
+
+        会访问数据库，界面中应在后台线程调用。
+        """
+        while True:
+            today = now_ts() // SECONDS_PER_DAY
+            with self._today_lock:
+                if not reload and self._today is not None and self._today.day == today:
+                    return self._today
+                writes = self._today_writes
+            state = TodayState(today, self.db.get_date_records(format_day(today), self.employee_id))
+            with self._today_lock:
+                # 载入期间有打卡时，新记录可能已更新到即将被替换的旧状态上，需要重新载入
+                if self._today_writes == writes:
+                    self._today = state
+                    return state
+    
+    def get_today_work_seconds(self, rest_periods: list = None):
+        """今天到目前为止的 (已工作秒数, 扣除休息后的秒数)，不访问数据库
+
+        当天状态尚未载入或已跨过午夜时返回 None，调用方应在后台调用 get_today_state() 载入。
+        """
+        current_ts = now_ts()
+        with self._today_lock:
+            state = self._today
+            if state is None or state.day != current_ts // SECONDS_PER_DAY:
+                return None
+            return state.worked_seconds(current_ts), state.net_seconds(current_ts, rest_periods)
     
     def get_today_summary(self) -> dict:
         """获取今日打卡摘要"""
-        records = self.db.get_today_records()
+        records = self.get_today_state().sorted_records()
         
-        in_times = [r['time'] for r in records if r['type'] == 'in']
-        out_times = [r['time'] for r in records if r['type'] == 'out']
+        in_times = [r.time for r in records if r.type == 'in']
+        out_times = [r.time for r in records if r.type == 'out']
         
         return {
             'total_records': len(records),
@@ -54,137 +156,265 @@ class ClockManager:
     
     def _subtract_rest_time(self, total_hours: float, start_dt: datetime, end_dt: datetime, rest_periods: list) -> float:
         """扣除休息时间（接收和返回都是小时单位）"""
-        work_hours = total_hours
-        
-        for rest in rest_periods:
-            try:
-                rest_start_str = rest['start']
-                rest_end_str = rest['end']
-                
-                # 解析休息时间
-                rest_start_time = datetime.strptime(rest_start_str, "%H:%M").time()
-                rest_end_time = datetime.strptime(rest_end_str, "%H:%M").time()
-                
-                # 创建完整的datetime对象
-                rest_start_dt = datetime.combine(start_dt.date(), rest_start_time)
-                rest_end_dt = datetime.combine(start_dt.date(), rest_end_time)
-                
-                # 如果结束时间小于开始时间，说明跨天了
-                if rest_end_dt < rest_start_dt:
-                    rest_end_dt += timedelta(days=1)
-                
-                # 计算休息时间与工作时间的重叠部分
-                overlap_start = max(start_dt, rest_start_dt)
-                overlap_end = min(end_dt, rest_end_dt)
-                
-                if overlap_end > overlap_start:
-                    rest_hours = (overlap_end - overlap_start).total_seconds() / 3600  # 转换为小时
-                    work_hours -= rest_hours
-                    
-            except Exception as e:
-                print(f"计算休息时间错误: {e}")
-                continue
-        
-        return max(0, work_hours)
+        rest_seconds = rest_overlap_seconds(datetime_to_ts(start_dt), datetime_to_ts(end_dt), rest_periods)
+        return max(0, total_hours - rest_seconds / 3600)
     
-    def calculate_daily_work_time(self, date_str: str, rest_periods: list = None) -> float:
-        """计算某天的工作时长（小时）"""
-        try:
-            records = self.db.get_date_records(date_str)
+    def calculate_daily_work_time(self, date_str: str, rest_periods: list = None, records: list = None) -> float:
+        """计算某天的工作时长（小时）
 
-            if len(records) < 2:
-                print(f"记录不足2条，返回0")
-                return 0.0
-            
-            # 获取当天的所有in和out记录
-            in_records = [r for r in records if r['type'] == 'in']
-            out_records = [r for r in records if r['type'] == 'out']
-            
-            if not in_records or not out_records:
-                print(f"缺少上班或下班记录")
-                return 0.0
-            
-            # 使用第一个in和最后一个out计算总时长
-            first_in_record = in_records[0]
-            last_out_record = out_records[-1]
-            
-            # 统一处理日期时间格式（处理格式不一致的问题）
-            def normalize_datetime(dt_str):
-                """标准化日期时间格式"""
-                # 处理月份和日期为单位数的情况（如 2025-9-25 -> 2025-09-25）
-                parts = dt_str.split(' ')
-                if len(parts) == 2:
-                    date_part, time_part = parts
-                    # 标准化日期部分
-                    date_parts = date_part.split('-')
-                    if len(date_parts) == 3:
-                        year, month, day = date_parts
-                        month = month.zfill(2)  # 月份补零
-                        day = day.zfill(2)      # 日期补零
-                        normalized_date = f"{year}-{month}-{day}"
-                        return f"{normalized_date} {time_part}"
-                return dt_str
-            
-            # 优先使用record_datetime字段，如果没有则使用record_time
-            first_in_str = first_in_record.get('datetime') or first_in_record.get('time', '')
-            last_out_str = last_out_record.get('datetime') or last_out_record.get('time', '')
-            
-            if not first_in_str or not last_out_str:
-                print(f"时间字符串为空")
-                return 0.0
-            
-            # 标准化时间格式
-            first_in_str = normalize_datetime(first_in_str)
-            last_out_str = normalize_datetime(last_out_str)
-            
-            # 解析时间
-            first_in = datetime.strptime(first_in_str, "%Y-%m-%d %H:%M:%S")
-            last_out = datetime.strptime(last_out_str, "%Y-%m-%d %H:%M:%S")
-            
-            if last_out <= first_in:
-                print(f"下班时间早于或等于上班时间")
-                return 0.0
-            
-            total_seconds = (last_out - first_in).total_seconds()
-            total_hours = total_seconds / 3600
-            
-            
-            # 扣除休息时间
-            if rest_periods:
-                total_hours = self._subtract_rest_time(total_hours, first_in, last_out, rest_periods)
+        已经查询过当天记录时可通过 records 传入，避免再次访问数据库。
+        未传入 records 时结果会被缓存，直到当天有新的打卡、范围未知的写入或休息时间段变化。
+        """
+        try:
+            cache_key = None
+            if records is None:
+                day = date_to_day(date_str)
+                cache_key = (day, RestSchedule.from_periods(rest_periods).key,
+                             self.db.day_version(day, self.employee_id))
+                cached = self._daily_cache.get(cache_key)
+                if cached is not None:
+                    return cached
+                records = self.db.get_date_records(date_str, self.employee_id)
             
-            return total_hours
+            # 使用第一个in和最后一个out计算总时长，并扣除休息时间
+            _, _, _, net_seconds = summarize_records(records, rest_periods)
+            hours = net_seconds / 3600
+            if cache_key is not None:
+                self._daily_cache.put(cache_key, hours)
+            return hours
             
         except Exception as e:
-            print(f"计算每日工时错误: {e}")
+            print(f"计算每日工时错误: {e}", file=sys.stderr)
             import traceback
             traceback.print_exc()
             return 0.0
     
-    def get_monthly_statistics(self, year: str = None, month: str = None, rest_periods: list = None) -> list:
-        """获取月份统计信息"""
+    def calculate_records_statistics(self, records, rest_periods: list = None) -> dict:
+        """根据已查询出的按时间排序的记录计算统计，单次遍历且不再访问数据库"""
+        return self._work_days_statistics(iter_daily_work(records, rest_periods))
+    
+    def calculate_shift_statistics(self, start_date, end_date, rest_periods: list = None,
+                                   max_shift_hours: float = None) -> dict:
+        """按班次统计 [start_date, end_date]（两端都包含）的工时，支持跨午夜的夜班
+
+        单次遍历按时间排序的记录，把上班与之后的第一次下班配对，工时计入班次开始的日期；
+        间隔超过 max_shift_hours（默认 MAX_SHIFT_HOURS）的上下班不配对。
+        结果格式与 calculate_records_statistics 相同。
+        """
         try:
-            records = self.db.get_monthly_records(year, month)
-            if records is None:
-                return []
-            return records
+            max_shift_seconds = int((max_shift_hours or self.MAX_SHIFT_HOURS) * 3600)
+            end_day = date_to_day(end_date) + 1
+            # 多读取最长班次覆盖的天数，范围内最后一天开始的夜班才能找到次日的下班记录
+            read_end = day_to_date(end_day - (-max_shift_seconds // SECONDS_PER_DAY))
+            records = self.db.iter_records(start_date, read_end, employee_id=self.employee_id)
+            rows = iter_shift_work(records, rest_periods, max_shift_seconds)
+            return self._work_days_statistics(row for row in rows if row[0] < end_day)
         except Exception as e:
-            print(f"获取月份统计失败: {e}")
-            return []
+            print(f"按班次统计失败: {e}", file=sys.stderr)
+            return self._work_days_statistics([])
+    
+    @staticmethod
+    def _work_days_statistics(daily_rows) -> dict:
+        """根据逐天的 (天数, 第一次上班, 最后一次下班, 总秒数, 净秒数) 汇总统计"""
+        work_days = []
+        total_seconds = 0
+        for row in daily_rows:
+            summary = DailySummary(*row)
+            if summary.net_seconds > 0:
+                work_days.append({
+                    'date': summary.date,
+                    'hours': summary.hours,
+                    'first_in': summary.first_in,
+                    'last_out': summary.last_out
+                })
+                total_seconds += summary.net_seconds
+        
+        total_days = len(work_days)
+        total_hours = total_seconds / 3600
+        return {
+            'total_days': total_days,
+            'total_hours': total_hours,
+            'average_hours': total_hours / total_days if total_days > 0 else 0.0,
+            'work_days': work_days
+        }
+    
+    def get_daily_statistics(self, target_month: str, rest_periods: list = None) -> list:
+        """获取某月（YYYY-MM）每天的打卡统计，按日期排序
 
-    def _get_monthly_remark(self, work_days, avg_hours):
-        """获取月份备注信息"""
-        if work_days == 0:
-            return "无打卡记录"
-        elif work_days < 10:
-            return "工作日较少"
-        elif avg_hours > 10:
+        一次分组查询取出每天第一次上班和最后一次下班，再统一扣除休息时间，不逐天查询。
+        每项包含 date、first_in、last_out（无记录时为 None）、work_hours 和 remark。
+        """
+        try:
+            year, month = (int(part) for part in target_month.split('-')[:2])
+            next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+            rest_schedule = RestSchedule.from_periods(rest_periods)
+            
+            statistics = []
+            for day, first_in_ts, last_out_ts in self.db.iter_day_bounds(
+                    date(year, month, 1), date(next_year, next_month, 1), self.employee_id):
+                gross, net = summarize_day(first_in_ts, last_out_ts, rest_schedule)
+                summary = DailySummary(day, first_in_ts, last_out_ts, gross, net)
+                statistics.append({
+                    'date': summary.date,
+                    'first_in': summary.first_in,
+                    'last_out': summary.last_out,
+                    'work_hours': summary.hours,
+                    'remark': self._get_daily_remark(summary)
+                })
+            return statistics
+        except Exception as e:
+            print(f"获取每日统计失败: {e}", file=sys.stderr)
+            return []
+    
+    def _get_daily_remark(self, summary: DailySummary) -> str:
+        """获取每日备注信息"""
+        if summary.first_in_ts is None:
+            return "缺少上班记录"
+        elif summary.last_out_ts is None:
+            return "缺少下班记录"
+        elif summary.last_out_ts <= summary.first_in_ts:
+            return "下班早于上班"
+        elif summary.hours > 10:
             return "工时较长"
-        elif avg_hours < 6:
+        elif summary.hours < 6:
             return "工时较短"
         else:
             return "正常"
     
+    def _apply_rest_periods(self, rest_periods: list = None):
+        """按 rest_periods 更新数据库保存的休息时间段；为 None 时沿用已保存的配置，不做改动"""
+        if rest_periods is not None:
+            self.db.set_rest_periods(rest_periods)
+    
+    def get_summary_totals(self, start=None, end=None, rest_periods: list = None) -> dict:
+        """[start, end) 范围内有工时的天数、总工时和平均工时，读取每日汇总表"""
+        self._apply_rest_periods(rest_periods)
+        total_days, net_seconds = self.db.get_summary_totals(start, end, self.employee_id)
+        total_hours = net_seconds / 3600
+        return {
+            'total_days': total_days,
+            'total_hours': total_hours,
+            'average_hours': total_hours / total_days if total_days > 0 else 0.0
+        }
+    
+    def get_summary_page(self, start=None, end=None, order_by: str = 'date', descending: bool = False,
+                         after: tuple = None, before: tuple = None, limit: int = 100, offset: int = 0) -> list:
+        """分页读取每日汇总，参数见 DatabaseManager.get_summary_page"""
+        return self.db.get_summary_page(start, end, order_by, descending, after, before, limit, offset,
+                                        self.employee_id)
+    
+    def get_monthly_statistics(self, year: str = None, month: str = None, rest_periods: list = None) -> list:
+        """获取月份统计信息
+
+        year 为空时返回所有有记录的月份；指定年份而不指定月份时返回该年 12 个月，
+        没有记录的月份工作日数为 0。数据直接取自数据库中的月度汇总。
+        """
+        try:
+            self._apply_rest_periods(rest_periods)
+            year = int(year) if year else None
+            month = int(month) if month and year else None
+            rollups = self.db.get_monthly_rollups(year, month, self.employee_id)
+            
+            if year is not None:
+                # 补齐没有记录的月份
+                found = {row[1]: row for row in rollups}
+                months = [month] if month else range(1, 13)
+                rollups = [found.get(m, (year, m, 0, 0)) for m in months]
+            
+            statistics = []
+            for row_year, row_month, work_days, net_seconds in rollups:
+                total_hours = net_seconds / 3600
+                avg_hours = total_hours / work_days if work_days > 0 else 0.0
+                statistics.append({
+                    'month': f"{row_year:04d}-{row_month:02d}",
+                    'work_days': work_days,
+                    'total_hours': total_hours,
+                    'avg_hours': avg_hours,
+                    'remark': self._get_monthly_remark(work_days, avg_hours)
+                })
+            return statistics
+        except Exception as e:
+            print(f"获取月份统计失败: {e}", file=sys.stderr)
+            return []
+    
+    # get_range_statistics 支持的分组方式：天数 -> 分组标签
+    PERIOD_KEYS = {
+        'day': lambda value: value.isoformat(),
+        'week': lambda value: "{0:04d}-W{1:02d}".format(*value.isocalendar()),
+        'month': lambda value: f"{value.year:04d}-{value.month:02d}",
+        'year': lambda value: f"{value.year:04d}",
+    }
+
+    def get_range_statistics(self, start_date, end_date, group_by: str = 'month', rest_periods: list = None) -> list:
+        """获取 [start_date, end_date] 日期范围内按天、周、月或年分组的统计，按时间排序
+
+        start_date / end_date 为 date 或 YYYY-MM-DD，两端都包含；周按 ISO 周（YYYY-Www）分组。
+        整个范围只做一次索引范围扫描，逐天扣除休息时间后流式累加到当前分组，
+        只返回有打卡记录的分组，每项包含 period、work_days、total_hours 和 avg_hours。
+        """
+        try:
+            period_key = self.PERIOD_KEYS.get(group_by)
+            if period_key is None:
+                raise ValueError(f"不支持的分组方式: {group_by}")
+            rest_schedule = RestSchedule.from_periods(rest_periods)
+            end_day = date_to_day(end_date) + 1
+
+            statistics = []
+            current_key = None
+            work_days = 0
+            net_seconds = 0
+            for day, first_in_ts, last_out_ts in self.db.iter_day_bounds(start_date, day_to_date(end_day),
+                                                                         self.employee_id):
+                key = period_key(day_to_date(day))
+                if key != current_key:
+                    if current_key is not None:
+                        statistics.append(self._period_statistics(current_key, work_days, net_seconds))
+                    current_key = key
+                    work_days = 0
+                    net_seconds = 0
+                _, net = summarize_day(first_in_ts, last_out_ts, rest_schedule)
+                work_days += net > 0
+                net_seconds += net
+            if current_key is not None:
+                statistics.append(self._period_statistics(current_key, work_days, net_seconds))
+            return statistics
+        except Exception as e:
+            print(f"获取日期范围统计失败: {e}", file=sys.stderr)
+            return []
+
+    @staticmethod
+    def _period_statistics(period: str, work_days: int, net_seconds: int) -> dict:
+        """一个分组的统计结果"""
+        total_hours = net_seconds / 3600
+        return {
+            'period': period,
+            'work_days': work_days,
+            'total_hours': total_hours,
+            'avg_hours': total_hours / work_days if work_days > 0 else 0.0
+        }
+
+    def get_yearly_statistics(self, rest_periods: list = None) -> list:
+        """获取每年的统计信息"""
+        try:
+            self._apply_rest_periods(rest_periods)
+            statistics = []
+            for year, work_days, net_seconds in self.db.get_yearly_rollups(self.employee_id):
+                total_hours = net_seconds / 3600
+                statistics.append({
+                    'year': year,
+                    'work_days': work_days,
+                    'total_hours': total_hours,
+                    'avg_hours': total_hours / work_days if work_days > 0 else 0.0
+                })
+            return statistics
+        except Exception as e:
+            print(f"获取年度统计失败: {e}", file=sys.stderr)
+            return []
+
+    def _get_monthly_remark(self, work_days, avg_hours):
+        """获取月份备注信息"""
+        return monthly_remark(work_days, avg_hours)
+    
     def calculate_monthly_statistics(self, year: int = None, month: int = None, rest_periods: list = None) -> dict:
         """计算月度统计"""
         now = datetime.now()
@@ -192,53 +422,60 @@ class ClockManager:
             year = now.year
         if month is None:
             month = now.month
+        year = int(year)
+        month = int(month)
         
-        records = self.db.get_monthly_records(year, month)
+        # 休息时间段变化时数据库会重建每日汇总，之后直接读取预先算好的每日工时
+        self._apply_rest_periods(rest_periods)
         
-        if not records:
-            return {
-                'year': year,
-                'month': month,
-                'total_days': 0,
-                'total_hours': 0.0,
-                'average_hours': 0.0,
-                'work_days': []
-            }
-        
-        # 按日期分组
-        daily_records = {}
-        for record in records:
-            date_str = record['date']
-            if date_str not in daily_records:
-                daily_records[date_str] = []
-            daily_records[date_str].append(record)
-        
-        # 计算每天的工作时长
-        work_days = []
-        total_hours = 0.0
-        
-        for date_str, day_records in daily_records.items():
-            daily_hours = self.calculate_daily_work_time(date_str, rest_periods)
-            if daily_hours > 0:
-                work_days.append({
-                    'date': date_str,
-                    'hours': daily_hours,
-                    'records': day_records
-                })
-                total_hours += daily_hours
+        # 当月没有新的打卡且休息时间段未变时直接使用缓存
+        cache_key = (year, month, self.db.rest_schedule.key,
+                     self.db.month_version(year, month, self.employee_id))
+        cached = self._monthly_cache.get(cache_key)
+        if cached is not None:
+            return cached
         
-        total_days = len(work_days)
-        average_hours = total_hours / total_days if total_days > 0 else 0.0
-                
-        return {
-            'year': year,
-            'month': month,
-            'total_days': total_days,
-            'total_hours': total_hours,
-            'average_hours': average_hours,
-            'work_days': work_days
-        }
+        summaries = self.db.get_monthly_summaries(year, month, self.employee_id)
+        statistics = monthly_statistics(year, month, summaries)
+        self._monthly_cache.put(cache_key, statistics)
+        return statistics
+    
+    def calculate_monthly_statistics_batch(self, year: int, month: int, employee_ids=None,
+                                           rest_periods: list = None, max_workers: int = None) -> dict:
+        """计算多个员工的月度统计，返回 {员工编号: 月度统计}
+
+        employee_ids 为空时统计所有有打卡记录的员工。员工分块后交给进程池并行计算，
+        每个工作进程使用自己的只读连接，结果格式与 calculate_monthly_statistics 相同。
+        rest_periods 为 None 时与 calculate_monthly_statistics 一样使用数据库中保存的配置。
+        """
+        # 进程池模块导入较慢，只在批量统计时才导入，打卡和单人统计不需要
+        from .payroll import compute_monthly_statistics_batch
+        if rest_periods is None:
+            rest_periods = self.db.rest_periods
+        try:
+            if employee_ids is None:
+                employee_ids = self.db.get_employee_ids()
+            return compute_monthly_statistics_batch(self.db.db_path, year, month, employee_ids,
+                                                    rest_periods, max_workers)
+        except Exception as e:
+            print(f"批量计算月度统计失败: {e}", file=sys.stderr)
+            return {}
     
     def get_all_records(self):
         """获取所有记录"""
-        return self.db.get_all_records()
\ No newline at end of file
+        return self.db.get_all_records(self.employee_id)
+    
+    def iter_records(self, start=None, end=None, batch_size: int = 1000):
+        """按时间顺序流式读取 [start, end) 范围内的记录，适合遍历全部历史"""
+        return self.db.iter_records(start, end, batch_size, self.employee_id)
+    
+    def export(self, output, kind: str = 'records', fmt: str = 'csv', start=None, end=None,
+               rest_periods: list = None, compress: bool = None, progress=None) -> int:
+        """把 [start, end) 范围内的记录或统计流式导出为 CSV / JSON Lines，返回导出的行数
+
+        参数含义见 exporter.export；rest_periods 为 None 时沿用已保存的休息时间段。
+        """
+        from .exporter import export
+        self._apply_rest_periods(rest_periods)
+        return export(self.db, output, kind, fmt, start, end, self.employee_id,
+                      compress=compress, progress=progress)
\ No newline at end of file
@@ -3,169 +3,813 @@
 """
 import sqlite3
 import os
-import re
-from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+import sys
+import json
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import List, Optional
+from .record import ClockRecord, DailySummary, DayChange
+from .timestamp import SECONDS_PER_DAY, parse_timestamp, date_to_day, day_to_date, format_ts
+from .worktime import RestSchedule, summarize_day
+
+# 未指定员工时使用的员工编号，单人使用时所有记录都属于该员工
+DEFAULT_EMPLOYEE = 'default'
 
 class DatabaseManager:
-    def __init__(self, db_path: str = "data/clock_in.db"):
+    # 数据库 schema 版本，记录在 PRAGMA user_version 中
+    SCHEMA_VERSION = 5
+    # 旧数据迁移时每批处理的记录数
+    MIGRATION_CHUNK_SIZE = 5000
+    # 迁移时无法解析的旧记录保存到此表，便于人工找回
+    UNPARSED_TABLE = 'clock_records_unparsed'
+    # 预编译语句缓存大小（sqlite3 默认为 128）
+    STATEMENT_CACHE_SIZE = 256
+    # 数据库被锁定时的等待秒数
+    BUSY_TIMEOUT = 10.0
+
+    def __init__(self, db_path: str = "data/clock_in.db", initialize: bool = True):
+        """initialize 为 False 时构造时不访问数据库，由调用方稍后（如在后台线程）调用 init_database()"""
         self.db_path = db_path
-        self.init_database()
-    
+        # 每个线程持有一个长连接，避免每次查询都重新 connect/close
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        # 数据版本号，见 data_generation()、day_version() 和 month_version()
+        self._generation = 0
+        self._global_generation = 0
+        self._day_versions = {}
+        self._month_versions = {}
+        self._generation_lock = threading.Lock()
+        # 当前生效的休息时间段及其编译后的时间表，每日汇总表中的净工时按此计算
+        self.rest_periods = []
+        self.rest_schedule = RestSchedule()
+        if initialize:
+            self.init_database()
+
+    def _connect(self) -> sqlite3.Connection:
+        """创建新的数据库连接并设置连接参数"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.BUSY_TIMEOUT,
+            isolation_level=None,  # 自动提交模式，事务由 transaction() 显式控制
+            check_same_thread=False,
+            cached_statements=self.STATEMENT_CACHE_SIZE,
+        )
+        # WAL 模式下读写互不阻塞，NORMAL 同步级别在 WAL 下仍保证一致性
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        return conn
+
+    def get_connection(self) -> sqlite3.Connection:
+        """获取当前线程的长连接，不存在时创建"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            self._local.depth = 0
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def transaction(self, scoped: bool = False):
+        """事务上下文，正常退出时提交，异常时回滚；支持嵌套（只有最外层真正提交）
+
+        scoped 为 True 表示事务内的写入只影响 _refresh_daily_summary 登记的天，提交时只增加
+        这些天和所在月份的版本号；嵌套的各层都为 scoped 时才按天处理，否则增加全局版本号。
+        """
+        conn = self.get_connection()
+        if self._local.depth == 0:
+            conn.execute('BEGIN IMMEDIATE')
+            self._local.scoped = True
+            self._local.changed_days = set()
+        if not scoped:
+            self._local.scoped = False
+        self._local.depth += 1
+        try:
+            yield conn.cursor()
+        except BaseException:
+            self._local.depth -= 1
+            if self._local.depth == 0:
+                conn.execute('ROLLBACK')
+            raise
+        else:
+            self._local.depth -= 1
+            if self._local.depth == 0:
+                conn.execute('COMMIT')
+                self._bump_generation(self._local.changed_days if self._local.scoped else None)
+
+    def _bump_generation(self, changed_days=None):
+        """记录一次提交；changed_days 为 None 时影响范围未知，所有按天和按月的版本一起失效"""
+        with self._generation_lock:
+            self._generation += 1
+            if changed_days is None:
+                self._global_generation += 1
+                return
+            for employee_id, day in changed_days:
+                day_key = (employee_id, day)
+                self._day_versions[day_key] = self._day_versions.get(day_key, 0) + 1
+                day_date = day_to_date(day)
+                month_key = (employee_id, day_date.year, day_date.month)
+                self._month_versions[month_key] = self._month_versions.get(month_key, 0) + 1
+
+    def data_generation(self) -> int:
+        """数据版本号，数据库内容可能变化后增加，调用方可用作缓存键的一部分
+
+        本对象的每次提交都会使其增加；其他连接或进程（如命令行打卡）的提交通过当前线程连接的
+        PRAGMA data_version 检测，线程首次调用时也会增加一次，保证之前的变化不被漏掉。
+        其他连接的提交影响范围未知，按全局变化处理。
+        """
+        version = self.get_connection().execute('PRAGMA data_version').fetchone()[0]
+        if getattr(self._local, 'data_version', None) != version:
+            self._local.data_version = version
+            self._bump_generation()
+        return self._generation
+
+    def day_version(self, day: int, employee_id: str = DEFAULT_EMPLOYEE) -> tuple:
+        """某员工某天数据的版本，只在这一天有打卡或范围未知的写入（批量导入、休息时间段重建、
+        其他连接的提交）之后变化，用作按天缓存的键"""
+        self.data_generation()
+        with self._generation_lock:
+            return self._global_generation, self._day_versions.get((employee_id, day), 0)
+
+    def month_version(self, year: int, month: int, employee_id: str = DEFAULT_EMPLOYEE) -> tuple:
+        """某员工某月数据的版本，规则同 day_version()"""
+        self.data_generation()
+        with self._generation_lock:
+            return self._global_generation, self._month_versions.get((employee_id, year, month), 0)
+
+    def close(self):
+        """关闭所有线程打开的连接"""
+        with self._connections_lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._connections.clear()
+        self._local = threading.local()
+
     def init_database(self):
         """初始化数据库"""
-        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        version = self._get_user_version()
+        if version == self.SCHEMA_VERSION:
+            # schema 已是最新版本，跳过建表和迁移检查，只读取休息时间配置
+            self.rest_periods = self._load_rest_periods(self.get_connection().cursor())
+            self.rest_schedule = RestSchedule.from_periods(self.rest_periods)
+            return
+
+        if version < 1 and self._has_legacy_table():
+            # 旧版本的文本时间表，分批迁移为整数时间戳表
+            self.migrate_legacy_records()
         
-        # 创建打卡记录表
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS clock_records (
+        with self.transaction() as cursor:
+            if 1 <= version < 4:
+                # 版本 4 新增员工编号，旧记录归属默认员工
+                self._add_employee_column(cursor)
+            self._create_schema(cursor)
+            self.rest_periods = self._load_rest_periods(cursor)
+            self.rest_schedule = RestSchedule.from_periods(self.rest_periods)
+            if version < 4:
+                # 版本 2、3 新增每日和月度汇总表，版本 4 的汇总表按员工区分，根据已有记录重新生成
+                self._rebuild_daily_summary(cursor, self.rest_schedule)
+            # 版本 5 新增每日汇总的排序索引，由 _create_schema 创建
+            cursor.execute(f'PRAGMA user_version = {self.SCHEMA_VERSION}')
+
+    def _get_user_version(self) -> int:
+        """读取数据库的 schema 版本号"""
+        return self.get_connection().execute('PRAGMA user_version').fetchone()[0]
+
+    def _has_legacy_table(self) -> bool:
+        """clock_records 是否还是以文本保存时间的旧表结构"""
+        columns = self.get_connection().execute('PRAGMA table_info(clock_records)').fetchall()
+        return any(column[1] == 'record_datetime' for column in columns)
+
+    @staticmethod
+    def _add_employee_column(cursor):
+        """为版本 4 之前的数据库增加员工编号列
+
+        唯一约束、索引和汇总表的主键都要加上员工编号，先删除旧的索引和汇总表，
+        之后由 _create_schema 按新结构重建。
+        """
+        cursor.execute('PRAGMA table_info(clock_records)')
+        if not any(column[1] == 'employee_id' for column in cursor.fetchall()):
+            cursor.execute(f'''
+                ALTER TABLE clock_records
+                ADD COLUMN employee_id TEXT NOT NULL DEFAULT '{DEFAULT_EMPLOYEE}'
+            ''')
+        cursor.execute('DROP INDEX IF EXISTS uq_clock_records_day_type')
+        cursor.execute('DROP INDEX IF EXISTS idx_day_cover')
+        cursor.execute('DROP INDEX IF EXISTS idx_type_ts')
+        cursor.execute('DROP TABLE IF EXISTS daily_summary')
+        cursor.execute('DROP TABLE IF EXISTS monthly_summary')
+
+    @staticmethod
+    def _create_records_table(cursor, table_name: str):
+        """创建打卡记录表
+
+        record_ts 为本地挂钟时间的纪元秒数，record_day 为 record_ts // 86400，
+        即 1970-01-01 起的天数，两者都由写入方计算，读取时无需再解析字符串。
+        """
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS {table_name} (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
-                record_date TEXT NOT NULL,
-                record_time TEXT NOT NULL,
+                employee_id TEXT NOT NULL DEFAULT '{DEFAULT_EMPLOYEE}',
+                record_day INTEGER NOT NULL,
+                record_ts INTEGER NOT NULL,
                 record_type TEXT NOT NULL,
-                record_datetime TEXT NOT NULL,
                 notes TEXT,
                 created_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         ''')
+        # 每个员工每天每种类型只保留一条记录
+        cursor.execute(f'''
+            CREATE UNIQUE INDEX IF NOT EXISTS uq_{table_name}_day_type
+            ON {table_name}(employee_id, record_day, record_type)
+        ''')
+
+    def _create_schema(self, cursor):
+        """创建表和索引"""
+        # 创建打卡记录表
+        self._create_records_table(cursor, 'clock_records')
         
         # 创建索引
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_date ON clock_records(record_date)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_datetime ON clock_records(record_datetime)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_type ON clock_records(record_type)')
-        
-        conn.commit()
-        conn.close()
-
-
-    def add_clock_record(self, record_time: str, record_type: str, notes: str = "") -> bool:
-        """添加打卡记录，支持仅时间部分的输入"""
-        try:
-            # 尝试用标准格式解析
-            try:
-                record_datetime_obj = datetime.strptime(record_time, "%Y-%m-%d %H:%M:%S")
-            except ValueError:
-                # 用正则补零
-                m = re.match(r"(\d{4})-(\d{1,2})-(\d{1,2}) (\d{1,2}):(\d{1,2}):(\d{1,2})", record_time)
-                if not m:
-                    raise ValueError("时间格式不正确")
-                y, mo, d, h, mi, s = m.groups()
-                record_time_fixed = f"{y}-{mo.zfill(2)}-{d.zfill(2)} {h.zfill(2)}:{mi.zfill(2)}:{s.zfill(2)}"
-                record_datetime_obj = datetime.strptime(record_time_fixed, "%Y-%m-%d %H:%M:%S")
-            # 强制补零
-            record_datetime = record_datetime_obj.strftime("%Y-%m-%d %H:%M:%S")
-            record_date = record_datetime_obj.strftime("%Y-%m-%d")
-                        
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # 检查当天是否已经存在该类型的打卡记录
-            cursor.execute('''
-                SELECT id FROM clock_records 
-                WHERE record_date = ? AND record_type = ?
-                ORDER BY record_datetime DESC 
-                LIMIT 1
-            ''', (record_date, record_type))
-            
-            existing_record = cursor.fetchone()
-            
-            if existing_record:
-                # 如果存在，更新该记录
-                cursor.execute('''
-                    UPDATE clock_records 
-                    SET record_time = ?, record_datetime = ?, notes = ?
-                    WHERE id = ?
-                ''', (record_datetime, record_datetime, notes, existing_record[0]))
-            else:
-                # 如果不存在，插入新记录
-                cursor.execute('''
-                    INSERT INTO clock_records 
-                    (record_date, record_time, record_type, record_datetime, notes)
+        # 按员工和日期范围查询的覆盖索引
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_day_cover
+            ON clock_records(employee_id, record_day, record_ts, record_type)
+        ''')
+        # 按类型取最后一次打卡：(员工, 类型, 时间) 复合索引可直接倒序取第一条
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_type_ts
+            ON clock_records(employee_id, record_type, record_ts)
+        ''')
+        
+        # 每日工时汇总，与打卡记录在同一事务中维护
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS daily_summary (
+                employee_id TEXT NOT NULL,
+                record_day INTEGER NOT NULL,
+                first_in_ts INTEGER,
+                last_out_ts INTEGER,
+                gross_seconds INTEGER NOT NULL DEFAULT 0,
+                net_seconds INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (employee_id, record_day)
+            ) WITHOUT ROWID
+        ''')
+        # 每日详情按上班时间、下班时间、工时排序分页时使用的索引，表达式与 SUMMARY_SORT_COLUMNS 一致
+        for column, expression in self.SUMMARY_SORT_COLUMNS.items():
+            if column != 'date':
+                cursor.execute(f'''
+                    CREATE INDEX IF NOT EXISTS idx_summary_{column}
+                    ON daily_summary(employee_id, {expression}, record_day)
+                ''')
+        
+        # 月度汇总：工作日数（净工时大于 0 的天数）与净工时合计
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS monthly_summary (
+                employee_id TEXT NOT NULL,
+                year INTEGER NOT NULL,
+                month INTEGER NOT NULL,
+                work_days INTEGER NOT NULL DEFAULT 0,
+                net_seconds INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (employee_id, year, month)
+            ) WITHOUT ROWID
+        ''')
+        
+        # 应用配置（如当前生效的休息时间段）
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS app_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            )
+        ''')
+
+    def migrate_legacy_records(self, chunk_size: int = None):
+        """把旧的文本时间表迁移到整数时间戳表
+
+        每批记录单独提交，迁移过程中其他连接仍可读取旧表；中途中断后再次启动会从
+        已迁移的最大 id 之后继续。全部复制完成后在一个事务里替换旧表并写入版本号，最后
+        VACUUM 回收旧表占用的空间。无法解析的记录原样复制到 UNPARSED_TABLE，不会丢失。
+        """
+        chunk_size = chunk_size or self.MIGRATION_CHUNK_SIZE
+        conn = self.get_connection()
+        
+        with self.transaction() as cursor:
+            self._create_records_table(cursor, 'clock_records_v1')
+            cursor.execute(f'''
+                CREATE TABLE IF NOT EXISTS {self.UNPARSED_TABLE} (
+                    id INTEGER PRIMARY KEY,
+                    record_datetime TEXT,
+                    record_type TEXT,
+                    notes TEXT,
+                    created_time TEXT
+                )
+            ''')
+        
+        last_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM clock_records_v1').fetchone()[0]
+        migrated = 0
+        skipped = 0
+        while True:
+            rows = conn.execute('''
+                SELECT id, record_datetime, record_type, notes, created_time
+                FROM clock_records
+                WHERE id > ?
+                ORDER BY id
+                LIMIT ?
+            ''', (last_id, chunk_size)).fetchall()
+            if not rows:
+                break
+            
+            new_rows = []
+            unparsed_rows = []
+            for record_id, record_datetime, record_type, notes, created_time in rows:
+                try:
+                    record_ts = parse_timestamp(record_datetime)
+                except ValueError:
+                    print(f"跳过无法解析的记录 id={record_id}: {record_datetime}", file=sys.stderr)
+                    unparsed_rows.append((record_id, record_datetime, record_type, notes, created_time))
+                    continue
+                new_rows.append((record_id, record_ts // SECONDS_PER_DAY, record_ts,
+                                 record_type, notes, created_time))
+            
+            with self.transaction() as cursor:
+                # 旧数据里未补零的日期可能与补零后的日期重复，以 id 较大（较新）的为准
+                cursor.executemany('''
+                    INSERT INTO clock_records_v1
+                    (id, record_day, record_ts, record_type, notes, created_time)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(employee_id, record_day, record_type) DO UPDATE SET
+                        record_ts = excluded.record_ts,
+                        notes = excluded.notes
+                ''', new_rows)
+                # 与本批迁移的记录在同一事务中保存，中断后重跑也不会重复或遗漏
+                cursor.executemany(f'''
+                    INSERT OR REPLACE INTO {self.UNPARSED_TABLE}
+                    (id, record_datetime, record_type, notes, created_time)
                     VALUES (?, ?, ?, ?, ?)
-                ''', (record_date, record_datetime, record_type, record_datetime, notes))
+                ''', unparsed_rows)
+            
+            last_id = rows[-1][0]
+            migrated += len(new_rows)
+            skipped += len(unparsed_rows)
+        
+        with self.transaction() as cursor:
+            cursor.execute('DROP TABLE clock_records')
+            cursor.execute('ALTER TABLE clock_records_v1 RENAME TO clock_records')
+            cursor.execute('DROP INDEX IF EXISTS uq_clock_records_v1_day_type')
+            self._create_schema(cursor)
+            # 版本 1：整数时间戳表，之后的升级由 init_database 继续完成
+            cursor.execute('PRAGMA user_version = 1')
+        
+        # 回收旧表占用的空间
+        conn.execute('VACUUM')
+        print(f"数据库迁移完成，共迁移 {migrated} 条记录", file=sys.stderr)
+        if skipped:
+            print(f"有 {skipped} 条记录无法解析，未迁移，已保存到 {self.UNPARSED_TABLE} 表", file=sys.stderr)
+
+    # 按 (员工, 日期, 类型) 去重的写入语句，冲突时覆盖已有记录
+    UPSERT_SQL = '''
+        INSERT INTO clock_records 
+        (employee_id, record_day, record_ts, record_type, notes)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(employee_id, record_day, record_type) DO UPDATE SET
+            record_ts = excluded.record_ts,
+            notes = excluded.notes
+    '''
+
+    # 每个员工每天第一次上班和最后一次下班时间，按员工和日期排序（沿 idx_day_cover 扫描，无需额外排序）
+    DAY_BOUNDS_SQL = '''
+        SELECT employee_id, record_day,
+               MIN(CASE WHEN record_type = 'in' THEN record_ts END),
+               MAX(CASE WHEN record_type = 'out' THEN record_ts END)
+        FROM clock_records
+        {where}
+        GROUP BY employee_id, record_day
+        ORDER BY employee_id, record_day
+    '''
+
+    SUMMARY_UPSERT_SQL = '''
+        INSERT OR REPLACE INTO daily_summary
+        (employee_id, record_day, first_in_ts, last_out_ts, gross_seconds, net_seconds)
+        VALUES (?, ?, ?, ?, ?, ?)
+    '''
+
+    @staticmethod
+    def _load_rest_periods(cursor) -> list:
+        """读取保存的休息时间段配置"""
+        cursor.execute("SELECT value FROM app_meta WHERE key = 'rest_periods'")
+        row = cursor.fetchone()
+        return json.loads(row[0]) if row else []
+
+    @staticmethod
+    def _summary_row(employee_id: str, day: int, first_in_ts, last_out_ts, rest_schedule: RestSchedule) -> tuple:
+        """计算一个员工一天的汇总行"""
+        gross, net = summarize_day(first_in_ts, last_out_ts, rest_schedule)
+        return (employee_id, day, first_in_ts, last_out_ts, gross, net)
+
+    def _rebuild_daily_summary(self, cursor, rest_schedule: RestSchedule):
+        """按给定休息时间段重新生成全部每日汇总（一次分组查询）"""
+        cursor.execute('DELETE FROM daily_summary')
+        read_cursor = self.get_connection().cursor()
+        read_cursor.execute(self.DAY_BOUNDS_SQL.format(where=''))
+        cursor.executemany(self.SUMMARY_UPSERT_SQL, (
+            self._summary_row(employee_id, day, first_in_ts, last_out_ts, rest_schedule)
+            for employee_id, day, first_in_ts, last_out_ts in read_cursor
+        ))
+        read_cursor.close()
+        self._rebuild_monthly_summary(cursor)
+
+    @staticmethod
+    def _rebuild_monthly_summary(cursor):
+        """根据每日汇总重新生成全部月度汇总"""
+        cursor.execute('DELETE FROM monthly_summary')
+        cursor.execute('''
+            INSERT INTO monthly_summary (employee_id, year, month, work_days, net_seconds)
+            SELECT employee_id,
+                   CAST(strftime('%Y', record_day * 86400, 'unixepoch') AS INTEGER),
+                   CAST(strftime('%m', record_day * 86400, 'unixepoch') AS INTEGER),
+                   SUM(net_seconds > 0),
+                   SUM(net_seconds)
+            FROM daily_summary
+            GROUP BY 1, 2, 3
+        ''')
+
+    def _refresh_daily_summary(self, cursor, employee_days) -> List[DayChange]:
+        """在当前事务中重新计算指定 (员工, 天数) 的每日汇总，并把变化量累加到月度汇总
+
+        返回每一天汇总的变化。
+        """
+        days_by_employee = {}
+        for employee_id, day in employee_days:
+            days_by_employee.setdefault(employee_id, set()).add(day)
+        
+        changes = []
+        month_deltas = {}
+        for employee_id, days in days_by_employee.items():
+            days = sorted(days)
+            # 分批查询，避免超过 SQLite 参数个数限制
+            for i in range(0, len(days), 500):
+                chunk = days[i:i + 500]
+                placeholders = ', '.join('?' * len(chunk))
+                params = [employee_id] + chunk
+                cursor.execute(f'''
+                    SELECT record_day, first_in_ts, last_out_ts, gross_seconds, net_seconds
+                    FROM daily_summary
+                    WHERE employee_id = ? AND record_day IN ({placeholders})
+                ''', params)
+                old_summaries = {row[0]: DailySummary(*row) for row in cursor.fetchall()}
+                cursor.execute(self.DAY_BOUNDS_SQL.format(
+                    where=f'WHERE employee_id = ? AND record_day IN ({placeholders})'), params)
+                rows = [self._summary_row(employee_id, day, first_in_ts, last_out_ts, self.rest_schedule)
+                        for _, day, first_in_ts, last_out_ts in cursor.fetchall()]
+                cursor.executemany(self.SUMMARY_UPSERT_SQL, rows)
+                
+                for row in rows:
+                    before = old_summaries.get(row[1])
+                    changes.append(DayChange(employee_id, before, DailySummary(*row[1:])))
+                    self._local.changed_days.add((employee_id, row[1]))
+                    day, new = row[1], row[5]
+                    old = before.net_seconds if before else 0
+                    if new == old:
+                        continue
+                    day_date = day_to_date(day)
+                    delta = month_deltas.setdefault((employee_id, day_date.year, day_date.month), [0, 0])
+                    delta[0] += (new > 0) - (old > 0)
+                    delta[1] += new - old
+        
+        if month_deltas:
+            cursor.executemany('''
+                INSERT INTO monthly_summary (employee_id, year, month, work_days, net_seconds)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(employee_id, year, month) DO UPDATE SET
+                    work_days = work_days + excluded.work_days,
+                    net_seconds = net_seconds + excluded.net_seconds
+            ''', [(employee_id, year, month, work_days, net_seconds)
+                  for (employee_id, year, month), (work_days, net_seconds) in month_deltas.items()])
+        return changes
+
+    def set_rest_periods(self, rest_periods: list) -> bool:
+        """设置计算工时使用的休息时间段，配置变化时重建每日汇总，返回是否重建"""
+        rest_periods = list(rest_periods or [])
+        rest_schedule = RestSchedule.from_periods(rest_periods)
+        # 合并后等价的配置不需要重建
+        if rest_schedule.key == self.rest_schedule.key:
+            return False
+        
+        with self.transaction() as cursor:
+            cursor.execute('''
+                INSERT INTO app_meta (key, value) VALUES ('rest_periods', ?)
+                ON CONFLICT(key) DO UPDATE SET value = excluded.value
+            ''', (json.dumps(rest_periods, ensure_ascii=False),))
+            self._rebuild_daily_summary(cursor, rest_schedule)
+        
+        self.rest_periods = rest_periods
+        self.rest_schedule = rest_schedule
+        return True
+
+    # 查询结果中的公共列，与 ClockRecord.row_factory 的顺序一致
+    RECORD_COLUMNS = 'record_ts, record_day, record_type, notes'
+
+    def _record_cursor(self) -> sqlite3.Cursor:
+        """返回把每行转换为 ClockRecord 的游标"""
+        cursor = self.get_connection().cursor()
+        cursor.row_factory = ClockRecord.row_factory
+        return cursor
+
+    def _build_row(self, record_time: str, record_type: str, notes: str = "",
+                   employee_id: str = DEFAULT_EMPLOYEE) -> tuple:
+        """把一条打卡数据转换为 UPSERT_SQL 的参数"""
+        record_ts = parse_timestamp(record_time)
+        return (employee_id, record_ts // SECONDS_PER_DAY, record_ts, record_type, notes or "")
+
+    def add_clock_record(self, record_time: str, record_type: str, notes: str = "",
+                         employee_id: str = DEFAULT_EMPLOYEE) -> Optional[DayChange]:
+        """添加打卡记录，成功时返回当天汇总的变化，失败时返回 None"""
+        try:
+            row = self._build_row(record_time, record_type, notes, employee_id)
+            
+            # 当天已有该类型的记录时直接覆盖，无需先查询；提交后只有这一天的缓存失效
+            with self.transaction(scoped=True) as cursor:
+                cursor.execute(self.UPSERT_SQL, row)
+                change, = self._refresh_daily_summary(cursor, [row[:2]])
             
-            print(f"database {record_datetime} {record_type}")
-            conn.commit()
-            conn.close()
-            return True
+            # 调试信息写到标准错误，不混入命令行工具的输出
+            print(f"database {employee_id} {format_ts(row[2])} {record_type}", file=sys.stderr)
+            return change
             
         except Exception as e:
-            print(f"添加记录失败: {e}")
-            return False
+            print(f"添加记录失败: {e}", file=sys.stderr)
+            return None
+
+    def add_clock_records_bulk(self, records, employee_id: str = DEFAULT_EMPLOYEE) -> int:
+        """批量导入打卡记录，返回写入条数
+
+        records 中每一项为 (record_time, record_type[, notes[, employee_id]])，
+        未带员工编号的记录属于 employee_id 参数指定的员工。
+        全部记录在同一个事务中写入，任一条格式错误时整批回滚。
+        同一员工同一天同类型出现多次时以最后一条为准，与逐条调用 add_clock_record 一致。
+        """
+        try:
+            rows = [self._build_row(*record) if len(record) > 3 else
+                    self._build_row(*record, employee_id=employee_id) for record in records]
+            if not rows:
+                return 0
+            
+            with self.transaction() as cursor:
+                cursor.executemany(self.UPSERT_SQL, rows)
+                self._refresh_daily_summary(cursor, (row[:2] for row in rows))
+            
+            return len(rows)
+            
+        except Exception as e:
+            print(f"批量导入记录失败: {e}", file=sys.stderr)
+            return 0
     
-    def get_today_records(self) -> List[Dict]:
+    def get_today_records(self, employee_id: str = DEFAULT_EMPLOYEE) -> List[ClockRecord]:
         """获取今天的打卡记录"""
         try:
             today = datetime.now().strftime("%Y-%m-%d")
-            return self.get_date_records(today)
+            return self.get_date_records(today, employee_id)
         except Exception as e:
-            print(f"查询今日记录失败: {e}")
+            print(f"查询今日记录失败: {e}", file=sys.stderr)
             return []
     
-    def get_date_records(self, date_str: str) -> List[Dict]:
+    def get_date_records(self, date_str: str, employee_id: str = DEFAULT_EMPLOYEE) -> List[ClockRecord]:
         """获取指定日期的记录"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            cursor = self._record_cursor()
             
-            cursor.execute('''
-                SELECT record_time, record_type, record_datetime, notes 
+            cursor.execute(f'''
+                SELECT {self.RECORD_COLUMNS}
                 FROM clock_records 
-                WHERE record_date = ? 
-                ORDER BY record_datetime
-            ''', (date_str,))
-            
-            records = []
-            for row in cursor.fetchall():
-                records.append({
-                    'time': row[0],
-                    'type': row[1],
-                    'datetime': row[2],
-                    'notes': row[3] or ''
-                })
-            conn.close()
-            return records
+                WHERE employee_id = ? AND record_day = ? 
+                ORDER BY record_ts
+            ''', (employee_id, date_to_day(date_str)))
+            
+            return cursor.fetchall()
             
         except Exception as e:
-            print(f"查询日期记录失败: {e}")
+            print(f"查询日期记录失败: {e}", file=sys.stderr)
             return []
     
-    def get_last_clock_time(self, record_type: str) -> Optional[Dict]:
+    def get_last_clock_time(self, record_type: str, employee_id: str = DEFAULT_EMPLOYEE) -> Optional[ClockRecord]:
         """获取最后一次指定类型的打卡时间"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            cursor = self._record_cursor()
             
-            cursor.execute('''
-                SELECT record_date, record_time, record_datetime, notes
+            cursor.execute(f'''
+                SELECT {self.RECORD_COLUMNS}
                 FROM clock_records 
-                WHERE record_type = ? 
-                ORDER BY datetime(record_datetime) DESC 
+                WHERE employee_id = ? AND record_type = ? 
+                ORDER BY record_ts DESC 
                 LIMIT 1
-            ''', (record_type,))
+            ''', (employee_id, record_type))
             
             result = cursor.fetchone()
-            conn.close()
             
             if result:
-                print(f"获取到的结果: {result}")
-
-                return {
-                    'date': result[0],
-                    'time': result[1],
-                    'datetime': result[2],
-                    'notes': result[3] or ''
-                }
+                print(f"获取到的结果: {result}", file=sys.stderr)
+
+                return result
             return None
             
         except Exception as e:
-            print(f"查询最后打卡时间失败: {e}")
+            print(f"查询最后打卡时间失败: {e}", file=sys.stderr)
             return None
+
+    MONTHLY_RECORDS_SQL = f'''
+        SELECT {RECORD_COLUMNS}
+        FROM clock_records 
+        WHERE employee_id = ? AND record_day >= ? AND record_day < ? 
+        ORDER BY record_day, record_ts
+    '''
+
+    @staticmethod
+    def _month_range(year, month) -> tuple:
+        """返回某月的天数半开区间 (本月1日, 下月1日)"""
+        year = int(year)
+        month = int(month)
+        next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+        return date_to_day(date(year, month, 1)), date_to_day(date(next_year, next_month, 1))
+
+    def explain_query_plan(self, sql: str, params: tuple = ()) -> List[str]:
+        """返回 EXPLAIN QUERY PLAN 的说明文字，用于确认查询是否使用了索引"""
+        cursor = self.get_connection().cursor()
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return [row[3] for row in cursor.fetchall()]
+
+    def explain_monthly_query(self, year: int, month: int) -> List[str]:
+        """月度查询的执行计划"""
+        return self.explain_query_plan(self.MONTHLY_RECORDS_SQL,
+                                       (DEFAULT_EMPLOYEE,) + self._month_range(year, month))
+    
+    def get_employee_ids(self) -> List[str]:
+        """获取所有有打卡记录的员工编号（按编号排序）"""
+        try:
+            cursor = self.get_connection().cursor()
+            # 利用 idx_day_cover 的第一列逐个跳到下一个员工，无需扫描全部记录
+            cursor.execute('''
+                WITH RECURSIVE employees(employee_id) AS (
+                    SELECT MIN(employee_id) FROM clock_records
+                    UNION ALL
+                    SELECT (SELECT MIN(employee_id) FROM clock_records WHERE employee_id > employees.employee_id)
+                    FROM employees WHERE employee_id IS NOT NULL
+                )
+                SELECT employee_id FROM employees WHERE employee_id IS NOT NULL
+            ''')
+            return [row[0] for row in cursor.fetchall()]
+            
+        except Exception as e:
+            print(f"查询员工列表失败: {e}", file=sys.stderr)
+            return []
     
-    def get_monthly_records(self, year: int = None, month: int = None) -> List[Dict]:
+    def get_monthly_summaries(self, year: int, month: int, employee_id: str = DEFAULT_EMPLOYEE) -> List[DailySummary]:
+        """获取某月有工时的每日汇总（按日期排序）"""
+        try:
+            cursor = self.get_connection().cursor()
+            cursor.row_factory = DailySummary.row_factory
+            cursor.execute('''
+                SELECT record_day, first_in_ts, last_out_ts, gross_seconds, net_seconds
+                FROM daily_summary
+                WHERE employee_id = ? AND record_day >= ? AND record_day < ? AND net_seconds > 0
+                ORDER BY record_day
+            ''', (employee_id,) + self._month_range(year, month))
+            return cursor.fetchall()
+            
+        except Exception as e:
+            print(f"查询每日汇总失败: {e}", file=sys.stderr)
+            return []
+    
+    # get_summary_page 可排序的列 -> SQL 表达式，上下班时间按一天中的时刻排序
+    SUMMARY_SORT_COLUMNS = {
+        'date': 'record_day',
+        'first_in': 'first_in_ts - record_day * 86400',
+        'last_out': 'last_out_ts - record_day * 86400',
+        'hours': 'net_seconds',
+    }
+
+    @staticmethod
+    def _summary_conditions(start, end, employee_id: str) -> tuple:
+        """有工时的每日汇总在 [start, end) 范围内的查询条件和参数"""
+        conditions = ['employee_id = ?', 'net_seconds > 0']
+        params = [employee_id]
+        if start is not None:
+            conditions.append('record_day >= ?')
+            params.append(date_to_day(start))
+        if end is not None:
+            conditions.append('record_day < ?')
+            params.append(date_to_day(end))
+        return conditions, params
+
+    def get_summary_totals(self, start=None, end=None, employee_id: str = DEFAULT_EMPLOYEE) -> tuple:
+        """[start, end) 范围内有工时的 (天数, 净工时秒数)"""
+        try:
+            conditions, params = self._summary_conditions(start, end, employee_id)
+            cursor = self.get_connection().cursor()
+            cursor.execute(f'''
+                SELECT COUNT(*), COALESCE(SUM(net_seconds), 0)
+                FROM daily_summary
+                WHERE {' AND '.join(conditions)}
+            ''', params)
+            return cursor.fetchone()
+            
+        except Exception as e:
+            print(f"查询汇总合计失败: {e}", file=sys.stderr)
+            return 0, 0
+
+    def get_summary_page(self, start=None, end=None, order_by: str = 'date', descending: bool = False,
+                         after: tuple = None, before: tuple = None, limit: int = 100, offset: int = 0,
+                         employee_id: str = DEFAULT_EMPLOYEE) -> List[tuple]:
+        """按列排序分页读取 [start, end) 范围内有工时的每日汇总，返回 [(键, DailySummary), ...]
+
+        键集分页：键为 (排序值, 天数)，after 取紧接在该键之后的 limit 行，before 取紧挨在
+        该键之前的 limit 行，翻页开销与所在位置无关。offset 只在直接跳转到某一位置时使用。
+        """
+        sort_expr = self.SUMMARY_SORT_COLUMNS[order_by]
+        # 按日期排序时日期本身就是唯一的，不需要第二个排序列，否则无法直接沿主键顺序读取
+        key_columns = ['record_day'] if order_by == 'date' else [sort_expr, 'record_day']
+        key_size = len(key_columns)
+        key_sql = f"({', '.join(key_columns)})"
+        key_marks = f"({', '.join('?' * key_size)})"
+        conditions, params = self._summary_conditions(start, end, employee_id)
+        if after is not None:
+            conditions.append(f"{key_sql} {'<' if descending else '>'} {key_marks}")
+            params.extend(after[-key_size:])
+        if before is not None:
+            conditions.append(f"{key_sql} {'>' if descending else '<'} {key_marks}")
+            params.extend(before[-key_size:])
+        # 向前翻页时按相反顺序取紧邻的行，再恢复为正常顺序
+        direction = 'DESC' if descending != (before is not None) else 'ASC'
+        order = ', '.join(f'{column} {direction}' for column in key_columns)
+        
+        cursor = self.get_connection().cursor()
+        cursor.execute(f'''
+            SELECT {sort_expr}, record_day, first_in_ts, last_out_ts, gross_seconds, net_seconds
+            FROM daily_summary
+            WHERE {' AND '.join(conditions)}
+            ORDER BY {order}
+            LIMIT ? OFFSET ?
+        ''', params + [limit, offset])
+        rows = [((row[0], row[1]), DailySummary(*row[1:])) for row in cursor.fetchall()]
+        if before is not None:
+            rows.reverse()
+        return rows
+
+    def get_monthly_rollups(self, year: int = None, month: int = None,
+                            employee_id: str = DEFAULT_EMPLOYEE) -> List[tuple]:
+        """获取员工的月度汇总 (年, 月, 工作日数, 净工时秒数)，按年月排序
+
+        year 为 None 时返回全部年份，month 为 None 时返回该年全部月份。
+        """
+        try:
+            conditions = ['employee_id = ?']
+            params = [employee_id]
+            if year is not None:
+                conditions.append('year = ?')
+                params.append(int(year))
+                if month is not None:
+                    conditions.append('month = ?')
+                    params.append(int(month))
+            
+            cursor = self.get_connection().cursor()
+            cursor.execute(f'''
+                SELECT year, month, work_days, net_seconds
+                FROM monthly_summary
+                WHERE {' AND '.join(conditions)}
+                ORDER BY year, month
+            ''', params)
+            return cursor.fetchall()
+            
+        except Exception as e:
+            print(f"查询月度汇总失败: {e}", file=sys.stderr)
+            return []
+    
+    def get_yearly_rollups(self, employee_id: str = DEFAULT_EMPLOYEE) -> List[tuple]:
+        """获取员工的年度汇总 (年, 工作日数, 净工时秒数)，由月度汇总合计得到"""
+        try:
+            cursor = self.get_connection().cursor()
+            cursor.execute('''
+                SELECT year, SUM(work_days), SUM(net_seconds)
+                FROM monthly_summary
+                WHERE employee_id = ?
+                GROUP BY year
+                ORDER BY year
+            ''', (employee_id,))
+            return cursor.fetchall()
+            
+        except Exception as e:
+            print(f"查询年度汇总失败: {e}", file=sys.stderr)
+            return []
+    
+    def get_monthly_records(self, year: int = None, month: int = None,
+                            employee_id: str = DEFAULT_EMPLOYEE) -> List[ClockRecord]:
         """获取指定年月的所有记录"""
         try:
             # 如果 year 或 month 为 None，使用当前年月
@@ -174,62 +818,105 @@ class DatabaseManager:
                 year = now.year
             if month is None:
                 month = now.month
-            year = int(year)
-            month = int(month)
-            month_str = f"{year:04d}-{month:02d}"
+            start_day, end_day = self._month_range(year, month)
             
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            cursor = self._record_cursor()
             
-            cursor.execute('''
-                SELECT record_date, record_time, record_type, record_datetime, notes
-                FROM clock_records 
-                WHERE record_date LIKE ? 
-                ORDER BY record_datetime
-            ''', (f"{month_str}%",))
-            
-            records = []
-            for row in cursor.fetchall():
-                records.append({
-                    'date': row[0],
-                    'time': row[1],
-                    'type': row[2],
-                    'datetime': row[3],
-                    'notes': row[4] or ''
-                })
-            
-            conn.close()
-            return records
+            # 半开区间 [本月1日, 下月1日) 可以直接走 idx_day_cover 范围扫描
+            cursor.execute(self.MONTHLY_RECORDS_SQL, (employee_id, start_day, end_day))
+            
+            return cursor.fetchall()
             
         except Exception as e:
-            print(f"查询月度记录失败: {e}")
+            print(f"查询月度记录失败: {e}", file=sys.stderr)
             return []
     
-    def get_all_records(self) -> List[Dict]:
-        """获取所有记录"""
+    def iter_records(self, start=None, end=None, batch_size: int = 1000,
+                     employee_id: str = DEFAULT_EMPLOYEE):
+        """按时间顺序逐条产出员工的记录，内存占用与总记录数无关
+
+        start / end 为日期（date 或 YYYY-MM-DD），取半开区间 [start, end)，
+        省略时不限制。每次从游标取 batch_size 条；查询出错时直接抛出异常，
+        避免调用方把中途失败当成数据已读完。
+        """
+        conditions = ['employee_id = ?']
+        params = [employee_id]
+        if start is not None:
+            conditions.append('record_day >= ?')
+            params.append(date_to_day(start))
+        if end is not None:
+            conditions.append('record_day < ?')
+            params.append(date_to_day(end))
+        
+        # 使用独立游标，迭代过程中同一连接上的其他查询不受影响
+        cursor = self._record_cursor()
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT record_date, record_time, record_type, record_datetime, notes
+            cursor.execute(f'''
+                SELECT {self.RECORD_COLUMNS}
                 FROM clock_records 
-                ORDER BY record_datetime
-            ''')
-            
-            records = []
-            for row in cursor.fetchall():
-                records.append({
-                    'date': row[0],
-                    'time': row[1],
-                    'type': row[2],
-                    'datetime': row[3],
-                    'notes': row[4] or ''
-                })
-            
-            conn.close()
-            return records
+                WHERE {' AND '.join(conditions)}
+                ORDER BY record_day, record_ts
+            ''', params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            cursor.close()
+    
+    def iter_daily_summaries(self, start=None, end=None, batch_size: int = 1000,
+                             employee_id: str = DEFAULT_EMPLOYEE):
+        """按日期顺序逐天产出 [start, end) 范围内有工时的 DailySummary
+
+        start / end 的含义与 iter_records 相同；每次从游标取 batch_size 条，查询出错时直接抛出异常。
+        """
+        conditions, params = self._summary_conditions(start, end, employee_id)
+        cursor = self.get_connection().cursor()
+        cursor.row_factory = DailySummary.row_factory
+        try:
+            cursor.execute(f'''
+                SELECT record_day, first_in_ts, last_out_ts, gross_seconds, net_seconds
+                FROM daily_summary
+                WHERE {' AND '.join(conditions)}
+                ORDER BY record_day
+            ''', params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            cursor.close()
+    
+    def iter_day_bounds(self, start=None, end=None, employee_id: str = DEFAULT_EMPLOYEE):
+        """按日期顺序逐天产出 (天数, 第一次上班, 最后一次下班)，缺少的一项为 None
+
+        用一次分组查询（条件聚合）完成，沿 idx_day_cover 范围扫描，不逐天查询。
+        start / end 的含义与 iter_records 相同；查询出错时直接抛出异常。
+        """
+        conditions = ['employee_id = ?']
+        params = [employee_id]
+        if start is not None:
+            conditions.append('record_day >= ?')
+            params.append(date_to_day(start))
+        if end is not None:
+            conditions.append('record_day < ?')
+            params.append(date_to_day(end))
+        
+        cursor = self.get_connection().cursor()
+        try:
+            cursor.execute(self.DAY_BOUNDS_SQL.format(where=f"WHERE {' AND '.join(conditions)}"), params)
+            for _, day, first_in_ts, last_out_ts in cursor:
+                yield day, first_in_ts, last_out_ts
+        finally:
+            cursor.close()
+    
+    def get_all_records(self, employee_id: str = DEFAULT_EMPLOYEE) -> List[ClockRecord]:
+        """获取员工的所有记录"""
+        try:
+            return list(self.iter_records(employee_id=employee_id))
             
         except Exception as e:
-            print(f"查询所有记录失败: {e}")
-            return []
\ No newline at end of file
+            print(f"查询所有记录失败: {e}", file=sys.stderr)
+            return []
@@ -0,0 +1,138 @@
+"""
+流式导出
+
+把打卡记录、每日统计或月度统计直接从数据库写成 CSV 或 JSON Lines。数据按固定大小的块
+读取和写入，内存占用与导出的行数无关，可以导出多年的数据。文件名以 .gz 结尾或指定
+compress 时用 gzip 压缩。
+"""
+import csv
+import gzip
+import json
+from itertools import islice
+from .database import DatabaseManager, DEFAULT_EMPLOYEE
+from .worktime import monthly_remark
+
+# 每块读取和写入的行数
+CHUNK_SIZE = 1000
+
+FORMATS = ('csv', 'jsonl')
+
+# 导出内容 -> 列定义 ((JSON 键, CSV 表头), ...)
+COLUMNS = {
+    'records': (
+        ('datetime', "日期时间"),
+        ('type', "类型"),
+        ('notes', "备注"),
+    ),
+    'daily': (
+        ('date', "日期"),
+        ('first_in', "上班时间"),
+        ('last_out', "下班时间"),
+        ('gross_hours', "在岗时长(小时)"),
+        ('hours', "工作时长(小时)"),
+    ),
+    'monthly': (
+        ('month', "月份"),
+        ('work_days', "工作日数"),
+        ('total_hours', "总工时(小时)"),
+        ('avg_hours', "平均每日工时(小时)"),
+        ('remark', "备注"),
+    ),
+}
+
+
+def _iter_records(db: DatabaseManager, start, end, employee_id: str, chunk_size: int):
+    for record in db.iter_records(start, end, chunk_size, employee_id):
+        yield record.datetime, record.type, record.notes
+
+
+def _iter_daily(db: DatabaseManager, start, end, employee_id: str, chunk_size: int):
+    for summary in db.iter_daily_summaries(start, end, chunk_size, employee_id):
+        yield (summary.date, summary.first_in, summary.last_out,
+               round(summary.gross_seconds / 3600, 2), round(summary.hours, 2))
+
+
+def _iter_monthly(db: DatabaseManager, start, end, employee_id: str, chunk_size: int):
+    """由每日汇总按月累加，范围的首尾月份只统计范围内的天数"""
+    current, work_days, net_seconds = None, 0, 0
+    for summary in db.iter_daily_summaries(start, end, chunk_size, employee_id):
+        month = summary.date[:7]
+        if month != current:
+            if current is not None:
+                yield _monthly_row(current, work_days, net_seconds)
+            current, work_days, net_seconds = month, 0, 0
+        work_days += 1
+        net_seconds += summary.net_seconds
+    if current is not None:
+        yield _monthly_row(current, work_days, net_seconds)
+
+
+def _monthly_row(month: str, work_days: int, net_seconds: int) -> tuple:
+    total_hours = net_seconds / 3600
+    avg_hours = total_hours / work_days
+    return month, work_days, round(total_hours, 2), round(avg_hours, 2), monthly_remark(work_days, avg_hours)
+
+
+_SOURCES = {
+    'records': _iter_records,
+    'daily': _iter_daily,
+    'monthly': _iter_monthly,
+}
+
+
+def _open_output(path: str, fmt: str, compress: bool):
+    """打开输出文件；CSV 带 BOM，方便 Excel 识别中文"""
+    encoding = 'utf-8-sig' if fmt == 'csv' else 'utf-8'
+    if compress:
+        return gzip.open(path, 'wt', encoding=encoding, newline='')
+    return open(path, 'w', encoding=encoding, newline='')
+
+
+def export(db: DatabaseManager, output, kind: str = 'records', fmt: str = 'csv', start=None, end=None,
+           employee_id: str = DEFAULT_EMPLOYEE, compress: bool = None, chunk_size: int = CHUNK_SIZE,
+           progress=None) -> int:
+    """导出 [start, end) 范围内的数据，返回导出的行数
+
+    kind 为 records（打卡记录）、daily（每日统计）或 monthly（月度统计），fmt 为 csv 或 jsonl。
+    output 为文件路径或已打开的文本文件对象（如 sys.stdout，不会被关闭，也不压缩）。
+    compress 为 None 时按文件名是否以 .gz 结尾决定。每写完一块调用 progress(已导出行数)。
+    统计按数据库当前的休息时间段计算；查询或写入出错时直接抛出异常。
+    """
+    if kind not in COLUMNS:
+        raise ValueError(f"不支持的导出内容: {kind}")
+    if fmt not in FORMATS:
+        raise ValueError(f"不支持的导出格式: {fmt}")
+
+    owns_file = not hasattr(output, 'write')
+    if owns_file:
+        if compress is None:
+            compress = str(output).endswith('.gz')
+        stream = _open_output(output, fmt, compress)
+    else:
+        stream = output
+
+    columns = COLUMNS[kind]
+    rows = _SOURCES[kind](db, start, end, employee_id, chunk_size)
+    count = 0
+    try:
+        if fmt == 'csv':
+            writer = csv.writer(stream)
+            writer.writerow([heading for _, heading in columns])
+        keys = [key for key, _ in columns]
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            if fmt == 'csv':
+                writer.writerows(chunk)
+            else:
+                stream.write(''.join(json.dumps(dict(zip(keys, row)), ensure_ascii=False) + '\n'
+                                     for row in chunk))
+            count += len(chunk)
+            if progress:
+                progress(count)
+    finally:
+        rows.close()
+        if owns_file:
+            stream.close()
+    return count
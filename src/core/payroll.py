@@ -0,0 +1,93 @@
+"""
+批量月度工时统计
+
+月底核算时为全部员工计算月度统计：员工按块分配给进程池中的工作进程，每个工作进程
+打开自己的只读连接，每块只用一次分组查询取出块内员工每天的第一次上班和最后一次下班，
+再按休息时间表扣除休息时间。只读取打卡记录，不改动数据库中保存的休息时间段和汇总表。
+"""
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from pathlib import Path
+from .database import DatabaseManager
+from .record import DailySummary
+from .worktime import RestSchedule, summarize_day, monthly_statistics
+
+# 每个任务处理的员工数，同时保证查询参数个数不超过 SQLite 的限制
+CHUNK_SIZE = 200
+
+# 工作进程内的只读连接，由 _init_worker 在进程启动时打开
+_worker_conn = None
+
+
+def _open_readonly(db_path: str) -> sqlite3.Connection:
+    """以只读方式打开数据库"""
+    uri = Path(db_path).resolve().as_uri() + '?mode=ro'
+    return sqlite3.connect(uri, uri=True, timeout=DatabaseManager.BUSY_TIMEOUT)
+
+
+def _init_worker(db_path: str):
+    """工作进程初始化：打开本进程的只读连接"""
+    global _worker_conn
+    _worker_conn = _open_readonly(db_path)
+
+
+def _worker_chunk(employee_ids: list, year: int, month: int, rest_periods: list) -> dict:
+    """在工作进程中计算一块员工的月度统计"""
+    return compute_chunk(_worker_conn, employee_ids, year, month, rest_periods)
+
+
+def compute_chunk(conn: sqlite3.Connection, employee_ids: list, year: int, month: int,
+                  rest_periods: list = None) -> dict:
+    """计算一组员工某月的统计，返回 {员工编号: 月度统计}"""
+    rest_schedule = RestSchedule.from_periods(rest_periods)
+    start_day, end_day = DatabaseManager._month_range(year, month)
+    placeholders = ', '.join('?' * len(employee_ids))
+    cursor = conn.execute(DatabaseManager.DAY_BOUNDS_SQL.format(
+        where=f'WHERE employee_id IN ({placeholders}) AND record_day >= ? AND record_day < ?'),
+        list(employee_ids) + [start_day, end_day])
+    
+    summaries = {employee_id: [] for employee_id in employee_ids}
+    for employee_id, day, first_in_ts, last_out_ts in cursor:
+        gross, net = summarize_day(first_in_ts, last_out_ts, rest_schedule)
+        if net > 0:
+            summaries[employee_id].append(DailySummary(day, first_in_ts, last_out_ts, gross, net))
+    cursor.close()
+    
+    return {
+        employee_id: monthly_statistics(year, month, sorted(days, key=lambda summary: summary.day))
+        for employee_id, days in summaries.items()
+    }
+
+
+def compute_monthly_statistics_batch(db_path: str, year: int, month: int, employee_ids,
+                                     rest_periods: list = None, max_workers: int = None,
+                                     chunk_size: int = CHUNK_SIZE) -> dict:
+    """并行计算多个员工某月的统计，返回 {员工编号: 月度统计}，顺序与 employee_ids 一致
+
+    每个员工的统计与使用相同休息时间段的 ClockManager(employee_id).calculate_monthly_statistics
+    相同；本函数不读取数据库中保存的配置，rest_periods 为空时不扣除休息时间。
+    只有一块或 max_workers 为 1 时直接在当前进程计算，省去启动进程池的开销。
+    """
+    year = int(year)
+    month = int(month)
+    employee_ids = list(employee_ids)
+    rest_periods = list(rest_periods or [])
+    chunks = [employee_ids[i:i + chunk_size] for i in range(0, len(employee_ids), chunk_size)]
+    
+    results = {}
+    if len(chunks) <= 1 or max_workers == 1:
+        conn = _open_readonly(db_path)
+        try:
+            for chunk in chunks:
+                results.update(compute_chunk(conn, chunk, year, month, rest_periods))
+        finally:
+            conn.close()
+        return results
+    
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                             initargs=(db_path,)) as executor:
+        for chunk_result in executor.map(_worker_chunk, chunks, repeat(year),
+                                         repeat(month), repeat(rest_periods)):
+            results.update(chunk_result)
+    return results
@@ -0,0 +1,152 @@
+"""
+打卡记录数据类型
+"""
+from .timestamp import format_ts, format_day
+
+
+class ClockRecord:
+    """一条打卡记录
+
+    只保存整数时间戳、天数、类型和备注，日期时间字符串在访问时才格式化。
+    过渡期间仍支持 record['time']、record.get('notes') 这样的字典式访问。
+    """
+    __slots__ = ('ts', 'day', 'type', 'notes')
+
+    # 支持字典式访问的键
+    KEYS = ('date', 'time', 'type', 'datetime', 'notes', 'ts', 'day')
+
+    def __init__(self, ts: int, day: int, record_type: str, notes: str = ''):
+        self.ts = ts
+        self.day = day
+        self.type = record_type
+        self.notes = notes or ''
+
+    @classmethod
+    def row_factory(cls, cursor, row):
+        """sqlite3 行工厂，要求查询列依次为 record_ts, record_day, record_type, notes"""
+        return cls(row[0], row[1], row[2], row[3])
+
+    @property
+    def datetime(self) -> str:
+        """YYYY-MM-DD HH:MM:SS 格式的打卡时间"""
+        return format_ts(self.ts)
+
+    @property
+    def date(self) -> str:
+        """YYYY-MM-DD 格式的打卡日期"""
+        return format_day(self.day)
+
+    @property
+    def time(self) -> str:
+        """与旧表 record_time 字段一致，为完整的日期时间"""
+        return self.datetime
+
+    def __getitem__(self, key):
+        if key not in self.KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in self.KEYS
+
+    def get(self, key, default=None):
+        """字典式取值"""
+        if key not in self.KEYS:
+            return default
+        return getattr(self, key)
+
+    def keys(self):
+        return self.KEYS
+
+    def to_dict(self) -> dict:
+        """转换为字典"""
+        return {key: getattr(self, key) for key in self.KEYS}
+
+    def __eq__(self, other):
+        if not isinstance(other, ClockRecord):
+            return NotImplemented
+        return (self.ts, self.type, self.notes) == (other.ts, other.type, other.notes)
+
+    def __repr__(self):
+        return f"ClockRecord({self.datetime!r}, {self.type!r}, notes={self.notes!r})"
+
+
+class DailySummary:
+    """一天的工时汇总（daily_summary 表的一行）"""
+    __slots__ = ('day', 'first_in_ts', 'last_out_ts', 'gross_seconds', 'net_seconds')
+
+    def __init__(self, day: int, first_in_ts, last_out_ts, gross_seconds: int, net_seconds: int):
+        self.day = day
+        self.first_in_ts = first_in_ts
+        self.last_out_ts = last_out_ts
+        self.gross_seconds = gross_seconds
+        self.net_seconds = net_seconds
+
+    @classmethod
+    def row_factory(cls, cursor, row):
+        """sqlite3 行工厂，查询列顺序与 __slots__ 一致"""
+        return cls(*row)
+
+    @property
+    def date(self) -> str:
+        """YYYY-MM-DD 格式的日期"""
+        return format_day(self.day)
+
+    @property
+    def first_in(self):
+        """第一次上班时间，无记录时为 None"""
+        if self.first_in_ts is None:
+            return None
+        return format_ts(self.first_in_ts)
+
+    @property
+    def last_out(self):
+        """最后一次下班时间，无记录时为 None"""
+        if self.last_out_ts is None:
+            return None
+        return format_ts(self.last_out_ts)
+
+    @property
+    def hours(self) -> float:
+        """扣除休息后的工时（小时）"""
+        return self.net_seconds / 3600
+
+    def __repr__(self):
+        return f"DailySummary({self.date!r}, hours={self.hours:.2f})"
+
+
+class DayChange:
+    """一次写入对某个员工某一天工时汇总的影响
+
+    before / after 为写入前后的 DailySummary，写入前当天没有汇总时 before 为 None。
+    界面可以据此只更新受影响的那一行和月度合计，而不必重新计算整月。
+    """
+    __slots__ = ('employee_id', 'before', 'after')
+
+    def __init__(self, employee_id: str, before, after):
+        self.employee_id = employee_id
+        self.before = before
+        self.after = after
+
+    @property
+    def day(self) -> int:
+        """受影响的天数"""
+        return self.after.day
+
+    @property
+    def date(self) -> str:
+        """受影响的日期（YYYY-MM-DD）"""
+        return self.after.date
+
+    @property
+    def net_delta(self) -> int:
+        """净工时的变化（秒）"""
+        return self.after.net_seconds - (self.before.net_seconds if self.before else 0)
+
+    @property
+    def work_days_delta(self) -> int:
+        """工作日数的变化（-1、0 或 1）"""
+        return (self.after.net_seconds > 0) - (self.before is not None and self.before.net_seconds > 0)
+
+    def __repr__(self):
+        return f"DayChange({self.employee_id!r}, {self.date!r}, net_delta={self.net_delta})"
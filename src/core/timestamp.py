@@ -0,0 +1,133 @@
+"""
+时间戳解析与转换
+
+数据库中的时间统一为本地挂钟时间的纪元秒数：把本地时间当作 UTC 换算，不受夏令时影响，
+天数为纪元秒数整除 86400。标准格式（YYYY-MM-DD HH:MM:SS，已补零）的字符串走定长切片的快速路径，
+旧数据中未补零的格式（如 2025-9-5 9:0:0）走正则解析，并缓存解析结果。
+"""
+import re
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from time import gmtime, strftime
+from typing import Union
+
+SECONDS_PER_DAY = 86400
+EPOCH = datetime(1970, 1, 1)
+EPOCH_DATE = EPOCH.date()
+_EPOCH_ORDINAL = EPOCH_DATE.toordinal()
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+DATE_FORMAT = "%Y-%m-%d"
+
+_LEGACY_DATETIME_RE = re.compile(r"(\d{4})-(\d{1,2})-(\d{1,2}) (\d{1,2}):(\d{1,2}):(\d{1,2})")
+_LEGACY_DATE_RE = re.compile(r"(\d{4})-(\d{1,2})-(\d{1,2})")
+
+
+def _is_canonical_datetime(value: str) -> bool:
+    """是否为已补零的 YYYY-MM-DD HH:MM:SS"""
+    return (len(value) == 19 and value[4] == '-' and value[7] == '-' and value[10] == ' '
+            and value[13] == ':' and value[16] == ':')
+
+
+@lru_cache(maxsize=4096)
+def _parse_legacy_datetime(value: str) -> datetime:
+    """解析未补零的日期时间（慢路径，结果缓存）"""
+    m = _LEGACY_DATETIME_RE.match(value.strip())
+    if not m:
+        raise ValueError("时间格式不正确")
+    return datetime(*map(int, m.groups()))
+
+
+@lru_cache(maxsize=4096)
+def _parse_legacy_date(value: str) -> date:
+    """解析未补零的日期（慢路径，结果缓存）"""
+    m = _LEGACY_DATE_RE.match(value.strip())
+    if not m:
+        raise ValueError("日期格式不正确")
+    return date(*map(int, m.groups()))
+
+
+def parse_datetime(value: str) -> datetime:
+    """解析 YYYY-MM-DD HH:MM:SS，兼容未补零的格式"""
+    if _is_canonical_datetime(value):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            pass
+    return _parse_legacy_datetime(value)
+
+
+def parse_date(value: Union[str, date]) -> date:
+    """解析 YYYY-MM-DD，兼容未补零的格式；传入 date 时原样返回"""
+    if isinstance(value, date):
+        return value
+    if len(value) == 10 and value[4] == '-' and value[7] == '-':
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            pass
+    return _parse_legacy_date(value)
+
+
+def parse_timestamp(value: str) -> int:
+    """把 YYYY-MM-DD HH:MM:SS 字符串直接解析为纪元秒数"""
+    if _is_canonical_datetime(value):
+        try:
+            hour, minute, second = int(value[11:13]), int(value[14:16]), int(value[17:19])
+            if hour < 24 and minute < 60 and second < 60:
+                day = date(int(value[0:4]), int(value[5:7]), int(value[8:10])).toordinal() - _EPOCH_ORDINAL
+                return day * SECONDS_PER_DAY + hour * 3600 + minute * 60 + second
+        except ValueError:
+            pass
+    return datetime_to_ts(_parse_legacy_datetime(value))
+
+
+def parse_hhmm(value: str) -> int:
+    """HH:MM 转换为当天的分钟数"""
+    hour, minute = value.split(':')
+    hour, minute = int(hour), int(minute)
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        raise ValueError(f"时间格式不正确: {value}")
+    return hour * 60 + minute
+
+
+def datetime_to_ts(dt: datetime) -> int:
+    """本地时间转换为纪元秒数"""
+    return (dt - EPOCH) // timedelta(seconds=1)
+
+
+def ts_to_datetime(ts: int) -> datetime:
+    """纪元秒数转换为本地时间"""
+    return EPOCH + timedelta(seconds=ts)
+
+
+def date_to_day(value: Union[str, date]) -> int:
+    """日期（date 或 YYYY-MM-DD 字符串）转换为 1970-01-01 起的天数"""
+    return parse_date(value).toordinal() - _EPOCH_ORDINAL
+
+
+def day_to_date(day: int) -> date:
+    """天数转换为日期"""
+    return date.fromordinal(day + _EPOCH_ORDINAL)
+
+
+def format_ts(ts: int) -> str:
+    """纪元秒数格式化为 YYYY-MM-DD HH:MM:SS"""
+    return strftime(DATETIME_FORMAT, gmtime(ts))
+
+
+def now_ts() -> int:
+    """当前本地时间的纪元秒数"""
+    return datetime_to_ts(datetime.now().replace(microsecond=0))
+
+
+def format_duration(seconds: int) -> str:
+    """秒数格式化为 H:MM:SS"""
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
+
+
+def format_day(day: int) -> str:
+    """天数格式化为 YYYY-MM-DD"""
+    return strftime(DATE_FORMAT, gmtime(day * SECONDS_PER_DAY))
@@ -0,0 +1,75 @@
+"""
+当天打卡状态
+"""
+from .worktime import RestSchedule
+
+
+class TodayState:
+    """一个员工当天的打卡状态
+
+    载入一次当天记录后由打卡操作原地更新，计算已工作时长时不再访问数据库。
+    每个员工每天每种类型只有一条记录，只需保存当天的上班和下班记录各一条。
+    """
+    __slots__ = ('day', 'records')
+
+    def __init__(self, day: int, records=()):
+        self.day = day
+        # 打卡类型 -> ClockRecord
+        self.records = {}
+        for record in records:
+            self.apply(record)
+
+    def apply(self, record) -> bool:
+        """合并一条新写入的记录，不是当天的记录时忽略并返回 False"""
+        if record.day != self.day:
+            return False
+        self.records[record.type] = record
+        return True
+
+    @property
+    def first_in_ts(self):
+        """当天上班时间戳，未上班时为 None"""
+        record = self.records.get('in')
+        return record.ts if record else None
+
+    @property
+    def last_out_ts(self):
+        """当天下班时间戳，未下班时为 None"""
+        record = self.records.get('out')
+        return record.ts if record else None
+
+    def sorted_records(self) -> list:
+        """按时间排序的当天记录"""
+        return sorted(self.records.values(), key=lambda record: record.ts)
+
+    def _work_span(self, now_ts: int):
+        """到 now_ts 为止的工作区间 (开始, 结束)，未上班时为 None"""
+        first_in = self.first_in_ts
+        if first_in is None or first_in >= now_ts:
+            return None
+        last_out = self.last_out_ts
+        if last_out is not None and last_out > first_in:
+            return first_in, min(last_out, now_ts)
+        # 尚未下班（或下班记录早于上班），计时到当前时间
+        return first_in, now_ts
+
+    def is_working(self, now_ts: int) -> bool:
+        """已上班且尚未下班"""
+        first_in = self.first_in_ts
+        if first_in is None or first_in > now_ts:
+            return False
+        last_out = self.last_out_ts
+        return last_out is None or last_out <= first_in or last_out > now_ts
+
+    def worked_seconds(self, now_ts: int) -> int:
+        """到 now_ts 为止已工作的秒数（未扣除休息时间）"""
+        span = self._work_span(now_ts)
+        return span[1] - span[0] if span else 0
+
+    def net_seconds(self, now_ts: int, rest_periods=None) -> int:
+        """到 now_ts 为止扣除休息时间后的工作秒数"""
+        span = self._work_span(now_ts)
+        if span is None:
+            return 0
+        rest = RestSchedule.from_periods(rest_periods).overlap_seconds(*span)
+        return max(0, span[1] - span[0] - rest)
@@ -0,0 +1,165 @@
+"""
+批量工时统计引擎
+
+把一段时间内的打卡记录载入为 NumPy 数组，用分组归约一次算出每日、每月、每年的工时；
+未安装 NumPy 时退回纯 Python 实现，两者结果一致。
+
+目前是独立的库，界面、命令行和导出都还没有调用；每次调用只统计一名员工。
+test/check_vectorized.py 检查它与 calculate_monthly_statistics 的结果一致。
+"""
+from .database import DEFAULT_EMPLOYEE
+from .timestamp import SECONDS_PER_DAY, date_to_day, day_to_date
+from .worktime import RestSchedule, iter_daily_work
+
+try:
+    import numpy as np
+except ImportError:  # NumPy 为可选依赖
+    np = None
+
+
+def has_numpy() -> bool:
+    """是否可以使用 NumPy 向量化计算"""
+    return np is not None
+
+
+def _day_year_month(day: int) -> tuple:
+    """天数转换为 (年, 月)"""
+    value = day_to_date(day)
+    return value.year, value.month
+
+
+def compute_work_statistics(db, start=None, end=None, rest_periods=None, use_numpy: bool = None,
+                            employee_id: str = DEFAULT_EMPLOYEE) -> dict:
+    """计算员工在 [start, end) 范围内的每日、每月、每年工时
+
+    返回字典：
+        daily   -- [(天数, 第一次上班, 最后一次下班, 总秒数, 净秒数), ...]，包含净工时为 0 的天
+        monthly -- [(年, 月, 工作日数, 净秒数), ...]
+        yearly  -- [(年, 工作日数, 净秒数), ...]
+    结果与 ClockManager.calculate_daily_work_time / calculate_monthly_statistics 一致。
+    use_numpy 为 None 时自动选择。
+    """
+    rest_schedule = RestSchedule.from_periods(rest_periods)
+    if use_numpy is None:
+        use_numpy = has_numpy()
+    if use_numpy:
+        if np is None:
+            raise RuntimeError("未安装 NumPy")
+        return _compute_numpy(db, start, end, rest_schedule, employee_id)
+    return _compute_python(db, start, end, rest_schedule, employee_id)
+
+
+def _compute_python(db, start, end, rest_schedule: RestSchedule, employee_id: str) -> dict:
+    """纯 Python 实现：流式遍历记录，逐天汇总后再按月、年合计"""
+    daily = list(iter_daily_work(db.iter_records(start, end, employee_id=employee_id), rest_schedule))
+
+    monthly = {}
+    for day, _, _, _, net in daily:
+        totals = monthly.setdefault(_day_year_month(day), [0, 0])
+        totals[0] += net > 0
+        totals[1] += net
+
+    yearly = {}
+    for (year, _), (work_days, net) in monthly.items():
+        totals = yearly.setdefault(year, [0, 0])
+        totals[0] += work_days
+        totals[1] += net
+
+    return {
+        'daily': daily,
+        'monthly': [(year, month, work_days, net) for (year, month), (work_days, net) in sorted(monthly.items())],
+        'yearly': [(year, work_days, net) for year, (work_days, net) in sorted(yearly.items())]
+    }
+
+
+def load_punch_arrays(db, start=None, end=None, employee_id: str = DEFAULT_EMPLOYEE) -> tuple:
+    """把员工在 [start, end) 范围内的记录载入为 (时间戳, 天数, 是否上班) 三个数组，按天和时间排序"""
+    conditions = ['employee_id = ?']
+    params = [employee_id]
+    if start is not None:
+        conditions.append('record_day >= ?')
+        params.append(date_to_day(start))
+    if end is not None:
+        conditions.append('record_day < ?')
+        params.append(date_to_day(end))
+
+    cursor = db.get_connection().cursor()
+    cursor.execute(f'''
+        SELECT record_ts, record_day, record_type = 'in'
+        FROM clock_records
+        WHERE {' AND '.join(conditions)}
+        ORDER BY record_day, record_ts
+    ''', params)
+    rows = np.array(cursor.fetchall(), dtype=np.int64).reshape(-1, 3)
+    cursor.close()
+    return rows[:, 0], rows[:, 1], rows[:, 2].astype(bool)
+
+
+def _rest_before(ts, rest_schedule: RestSchedule):
+    """RestSchedule.rest_before 的向量化版本"""
+    if not rest_schedule:
+        return np.zeros_like(ts)
+    starts = np.asarray(rest_schedule.starts, dtype=np.int64)
+    ends = np.asarray(rest_schedule.ends, dtype=np.int64)
+    prefix = np.asarray(rest_schedule.prefix[:-1], dtype=np.int64)
+
+    days, seconds = np.divmod(ts, SECONDS_PER_DAY)
+    index = np.searchsorted(starts, seconds, side='right') - 1
+    safe = np.clip(index, 0, None)
+    covered = prefix[safe] + np.minimum(seconds, ends[safe]) - starts[safe]
+    covered = np.where(index >= 0, covered, 0)
+    return days * rest_schedule.daily_seconds + covered
+
+
+def _group_sum(keys, work_days, net):
+    """按 keys 分组求和，返回 (唯一键, 工作日数, 净秒数)"""
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    days_sum = np.zeros(len(unique_keys), dtype=np.int64)
+    net_sum = np.zeros(len(unique_keys), dtype=np.int64)
+    np.add.at(days_sum, inverse, work_days)
+    np.add.at(net_sum, inverse, net)
+    return unique_keys, days_sum, net_sum
+
+
+def _compute_numpy(db, start, end, rest_schedule: RestSchedule, employee_id: str) -> dict:
+    """NumPy 实现：一次载入全部记录，用分组归约计算每天的第一次上班和最后一次下班"""
+    ts, day, is_in = load_punch_arrays(db, start, end, employee_id)
+    if len(ts) == 0:
+        return {'daily': [], 'monthly': [], 'yearly': []}
+
+    # 记录已按天排序，每天的起始下标即天数变化的位置
+    group_starts = np.concatenate(([0], np.flatnonzero(np.diff(day)) + 1))
+    days = day[group_starts]
+
+    missing_in = np.iinfo(np.int64).max
+    missing_out = np.iinfo(np.int64).min
+    first_in = np.minimum.reduceat(np.where(is_in, ts, missing_in), group_starts)
+    last_out = np.maximum.reduceat(np.where(is_in, missing_out, ts), group_starts)
+    has_in = first_in != missing_in
+    has_out = last_out != missing_out
+
+    valid = has_in & has_out & (last_out > first_in)
+    safe_in = np.where(valid, first_in, 0)
+    safe_out = np.where(valid, last_out, 0)
+    gross = safe_out - safe_in
+    net = np.maximum(gross - (_rest_before(safe_out, rest_schedule) - _rest_before(safe_in, rest_schedule)), 0)
+
+    daily = [
+        (d, i if has_i else None, o if has_o else None, g, n)
+        for d, i, has_i, o, has_o, g, n in zip(
+            days.tolist(), first_in.tolist(), has_in.tolist(),
+            last_out.tolist(), has_out.tolist(), gross.tolist(), net.tolist())
+    ]
+
+    # 天数 -> 自 1970-01 起的月份序号
+    month_index = days.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+    worked = (net > 0).astype(np.int64)
+    months, month_days, month_net = _group_sum(month_index, worked, net)
+    years, year_days, year_net = _group_sum(month_index // 12, worked, net)
+
+    return {
+        'daily': daily,
+        'monthly': [(int(m // 12 + 1970), int(m % 12 + 1), int(w), int(n))
+                    for m, w, n in zip(months, month_days, month_net)],
+        'yearly': [(int(y + 1970), int(w), int(n)) for y, w, n in zip(years, year_days, year_net)]
+    }
@@ -0,0 +1,229 @@
+"""
+工时计算
+"""
+import json
+import os
+import sys
+from bisect import bisect_right
+from .timestamp import SECONDS_PER_DAY, parse_hhmm
+
+# 班次配对的默认最长班次，上下班间隔超过此时长时视为漏打卡，不配对
+MAX_SHIFT_SECONDS = 16 * 3600
+
+
+class RestSchedule:
+    """编译后的每日休息时间表
+
+    休息时间段转换为当天的分钟偏移，排序并合并重叠部分后保存前缀和，
+    任意 [开始, 结束] 时间段与休息时间的重叠可用二分查找在 O(log n) 内算出。
+    休息时间按天重复，结束早于开始的时间段视为跨越午夜。
+    """
+    __slots__ = ('starts', 'ends', 'prefix', 'daily_seconds', 'key')
+
+    # 已编译的时间表，按配置内容缓存以便跨天、跨月复用
+    _cache = {}
+    _CACHE_SIZE = 32
+
+    def __init__(self, rest_periods: list = None):
+        intervals = []
+        for rest in rest_periods or []:
+            try:
+                start = parse_hhmm(rest['start']) * 60
+                end = parse_hhmm(rest['end']) * 60
+            except Exception as e:
+                print(f"计算休息时间错误: {e}", file=sys.stderr)
+                continue
+            if start < end:
+                intervals.append((start, end))
+            elif end < start:
+                # 跨天的休息时间拆成两段
+                intervals.append((start, SECONDS_PER_DAY))
+                if end > 0:
+                    intervals.append((0, end))
+        
+        # 排序并合并重叠或相邻的时间段，避免重复扣除
+        merged = []
+        for start, end in sorted(intervals):
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        
+        self.starts = [start for start, _ in merged]
+        self.ends = [end for _, end in merged]
+        # prefix[i] 为第 i 段之前所有休息时间段的总秒数
+        self.prefix = [0]
+        for start, end in merged:
+            self.prefix.append(self.prefix[-1] + end - start)
+        self.daily_seconds = self.prefix[-1]
+        self.key = json.dumps([[start // 60, end // 60] for start, end in merged])
+
+    @classmethod
+    def from_periods(cls, rest_periods):
+        """获取休息时间段对应的时间表，相同配置只编译一次"""
+        if isinstance(rest_periods, RestSchedule):
+            return rest_periods
+        cache_key = tuple((rest.get('start'), rest.get('end')) for rest in rest_periods or [])
+        schedule = cls._cache.get(cache_key)
+        if schedule is None:
+            if len(cls._cache) >= cls._CACHE_SIZE:
+                cls._cache.clear()
+            schedule = cls._cache[cache_key] = cls(rest_periods)
+        return schedule
+
+    @classmethod
+    def load(cls, rest_file: str = "data/rest_periods.json"):
+        """从休息时间段配置文件编译时间表，文件不存在或无法读取时为空表"""
+        rest_periods = []
+        if os.path.exists(rest_file):
+            try:
+                with open(rest_file, 'r', encoding='utf-8') as f:
+                    rest_periods = json.load(f)
+            except Exception as e:
+                print(f"加载休息时间段失败: {e}", file=sys.stderr)
+        return cls.from_periods(rest_periods)
+
+    def __bool__(self):
+        return self.daily_seconds > 0
+
+    def rest_before(self, ts: int) -> int:
+        """从纪元开始到 ts 为止累计的休息秒数"""
+        days, seconds = divmod(ts, SECONDS_PER_DAY)
+        i = bisect_right(self.starts, seconds) - 1
+        covered = 0
+        if i >= 0:
+            covered = self.prefix[i] + min(seconds, self.ends[i]) - self.starts[i]
+        return days * self.daily_seconds + covered
+
+    def overlap_seconds(self, start_ts: int, end_ts: int) -> int:
+        """[start_ts, end_ts] 与休息时间重叠的秒数"""
+        if end_ts <= start_ts or not self.daily_seconds:
+            return 0
+        return self.rest_before(end_ts) - self.rest_before(start_ts)
+
+
+def rest_overlap_seconds(start_ts: int, end_ts: int, rest_periods) -> int:
+    """计算 [start_ts, end_ts] 与休息时间段重叠的秒数
+
+    rest_periods 可以是休息时间段列表或已编译的 RestSchedule。
+    """
+    if not rest_periods:
+        return 0
+    return RestSchedule.from_periods(rest_periods).overlap_seconds(start_ts, end_ts)
+
+
+def summarize_day(first_in_ts, last_out_ts, rest_periods: list = None) -> tuple:
+    """根据当天第一次上班和最后一次下班计算 (总秒数, 扣除休息后的秒数)
+
+    缺少上班或下班记录、或下班不晚于上班时均为 (0, 0)。
+    """
+    if first_in_ts is None or last_out_ts is None or last_out_ts <= first_in_ts:
+        return 0, 0
+    gross = last_out_ts - first_in_ts
+    net = gross - rest_overlap_seconds(first_in_ts, last_out_ts, rest_periods)
+    return gross, max(0, net)
+
+
+def summarize_records(day_records, rest_periods: list = None) -> tuple:
+    """根据一天的打卡记录计算 (第一次上班, 最后一次下班, 总秒数, 净秒数)
+
+    纯函数，不访问数据库；记录需按时间排序并带有 ts、type 属性。
+    """
+    first_in_ts = None
+    last_out_ts = None
+    for record in day_records:
+        if record.type == 'in':
+            if first_in_ts is None:
+                first_in_ts = record.ts
+        elif record.type == 'out':
+            last_out_ts = record.ts
+    gross, net = summarize_day(first_in_ts, last_out_ts, rest_periods)
+    return first_in_ts, last_out_ts, gross, net
+
+
+def iter_daily_work(records, rest_periods: list = None):
+    """单次遍历按时间排序的记录，逐天产出 (天数, 第一次上班, 最后一次下班, 总秒数, 净秒数)"""
+    rest_periods = RestSchedule.from_periods(rest_periods)
+    day_records = []
+    current_day = None
+    for record in records:
+        if record.day != current_day:
+            if day_records:
+                yield (current_day,) + summarize_records(day_records, rest_periods)
+            current_day = record.day
+            day_records = []
+        day_records.append(record)
+    if day_records:
+        yield (current_day,) + summarize_records(day_records, rest_periods)
+
+
+def iter_shifts(records, max_shift_seconds: int = MAX_SHIFT_SECONDS):
+    """扫描线配对：单次遍历按时间排序的记录，产出 (上班时间戳, 下班时间戳)
+
+    每条上班记录与其后的第一条下班记录配对，可以跨越午夜；间隔超过 max_shift_seconds
+    时视为漏打卡不配对。连续两次上班以后一次为准，没有对应上班的下班记录被忽略。
+    """
+    open_in_ts = None
+    for record in records:
+        if record.type == 'in':
+            open_in_ts = record.ts
+        elif record.type == 'out' and open_in_ts is not None:
+            if 0 < record.ts - open_in_ts <= max_shift_seconds:
+                yield open_in_ts, record.ts
+            open_in_ts = None
+
+
+def iter_shift_work(records, rest_periods: list = None, max_shift_seconds: int = MAX_SHIFT_SECONDS):
+    """按班次开始日期逐天产出 (天数, 第一次上班, 最后一次下班, 总秒数, 净秒数)
+
+    跨午夜的夜班整段计入上班当天，只产出有配对班次的日期；时间复杂度与记录数成线性关系。
+    """
+    rest_periods = RestSchedule.from_periods(rest_periods)
+    current = None
+    for start_ts, end_ts in iter_shifts(records, max_shift_seconds):
+        day = start_ts // SECONDS_PER_DAY
+        gross, net = summarize_day(start_ts, end_ts, rest_periods)
+        if current is not None and current[0] == day:
+            current[2] = end_ts
+            current[3] += gross
+            current[4] += net
+        else:
+            if current is not None:
+                yield tuple(current)
+            current = [day, start_ts, end_ts, gross, net]
+    if current is not None:
+        yield tuple(current)
+
+
+def monthly_statistics(year: int, month: int, summaries) -> dict:
+    """根据某月有工时的每日汇总（按日期排序）生成月度统计"""
+    work_days = [{
+        'date': summary.date,
+        'hours': summary.hours,
+        'first_in': summary.first_in,
+        'last_out': summary.last_out
+    } for summary in summaries]
+    total_hours = sum(summary.net_seconds for summary in summaries) / 3600
+    total_days = len(work_days)
+    return {
+        'year': year,
+        'month': month,
+        'total_days': total_days,
+        'total_hours': total_hours,
+        'average_hours': total_hours / total_days if total_days > 0 else 0.0,
+        'work_days': work_days
+    }
+
+
+def monthly_remark(work_days: int, avg_hours: float) -> str:
+    """月份统计的备注信息"""
+    if work_days == 0:
+        return "无打卡记录"
+    elif work_days < 10:
+        return "工作日较少"
+    elif avg_hours > 10:
+        return "工时较长"
+    elif avg_hours < 6:
+        return "工时较短"
+    else:
+        return "正常"
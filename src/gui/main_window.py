@@ -2,23 +2,94 @@
 主窗口界面
 """
 import tkinter as tk
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from tkinter import ttk, messagebox
 from datetime import datetime
 import json
+import logging
 import os
+import time
 from core.clock_manager import ClockManager
+from core.database import DatabaseManager
+from core.timestamp import parse_datetime, parse_hhmm, format_duration, day_to_date
+from gui.worker import BackgroundWorker
+from gui.paged_table import PagedTable, DailySummarySource
+
+logger = logging.getLogger(__name__)
 
 class ClockInApp:
-    def __init__(self, root, config):
+    # 合并短时间内多次刷新请求的延迟（毫秒）
+    REFRESH_DELAY = 100
+
+    def __init__(self, root, config, started_at: float = None):
+        # 启动计时的起点（time.perf_counter()），用于记录首次绘制和数据就绪的耗时
+        self._started_at = started_at if started_at is not None else time.perf_counter()
+        self._painted_at = None
+        # 当天打卡状态正在后台载入
+        self._today_loading = False
+        # 启动时尚未完成首次载入的数据，全部完成后记录数据就绪耗时
+        self._startup_pending = {'today_state', 'last_clock', 'monthly_display'}
         self.root = root
         self.config = config
-        self.clock_manager = ClockManager()
+        # 构造时不访问数据库，窗口显示后由后台线程初始化（可能包含旧数据迁移）
+        self.clock_manager = ClockManager(db=DatabaseManager(initialize=False))
         self.rest_periods = self.load_rest_periods()  # 加载保存的休息时间段
+        # 数据库读写和统计在后台线程执行，避免界面卡顿
+        self.worker = BackgroundWorker(root, on_status=self.set_status)
+        # 当前显示的本月统计 (年, 月, 工作日数, 净工时秒数)，打卡后据此增量更新
+        self._month_state = None
+        # 名称 -> root.after 任务，用于合并刷新请求
+        self._scheduled = {}
         
         self.setup_window()
         self.create_widgets()
+        # 先显示窗口和占位文字，窗口映射后再在后台依次载入数据
+        self.root.bind('<Map>', self.start_loading, add='+')
+
+    def start_loading(self, event=None):
+        """窗口首次显示后开始在后台载入数据：当天打卡状态、最后打卡时间、本月统计"""
+        if self._painted_at is not None:
+            return
+        self.root.update_idletasks()
+        self._painted_at = time.perf_counter()
+        logger.info("启动计时: 首次绘制 %.0f ms", (self._painted_at - self._started_at) * 1000)
+
+        # 后台任务按提交顺序执行，之后的查询都在数据库初始化完成后进行
+        self.worker.submit('init_database', self.clock_manager.db.init_database,
+                           on_error=lambda e: messagebox.showerror("错误", f"打开数据库失败: {e}"),
+                           status="正在打开数据库...")
         self.refresh_display()
+
+    def load_today_state(self, reload: bool = False):
+        """在后台载入当天打卡状态，已在载入时不重复提交"""
+        if self._today_loading and not reload:
+            return
+        self._today_loading = True
+        self.worker.submit('today_state', self.clock_manager.get_today_state, reload,
+                           on_done=self.on_today_loaded, on_error=self.on_today_load_failed,
+                           status="正在读取今日打卡...")
+
+    def on_today_loaded(self, state):
+        """当天打卡状态载入后开始显示今日工时计时"""
+        self._today_loading = False
+        self.update_today_work_display()
+        self._startup_done('today_state')
+
+    def on_today_load_failed(self, error):
+        """载入失败时允许下一次计时重新提交"""
+        self._today_loading = False
+        print(f"读取今日打卡失败: {error}")
+
+    def _startup_done(self, name):
+        """某项启动数据已显示，全部显示后记录数据就绪耗时"""
+        if name not in self._startup_pending:
+            return
+        self._startup_pending.discard(name)
+        if self._startup_pending:
+            return
+        now = time.perf_counter()
+        logger.info("启动计时: 数据就绪 %.0f ms（首次绘制后 %.0f ms）",
+                    (now - self._started_at) * 1000, (now - self._painted_at) * 1000)
     
     def setup_window(self):
         """设置窗口属性"""
@@ -69,6 +140,9 @@ class ClockInApp:
         # 打卡统计区
         self.create_monthly_average_display(main_frame, row=6)
         
+        # 状态栏
+        self.create_status_bar(main_frame, row=7)
+        
         # 更新时间显示
         self.update_time_display()
 
@@ -80,17 +154,24 @@ class ClockInApp:
         
         # 最后上班时间
         ttk.Label(last_clock_frame, text="最后上班时间:", font=("Arial", 10)).grid(row=0, column=0, sticky=tk.W)
-        self.last_in_var = tk.StringVar(value="暂无记录")
+        self.last_in_var = tk.StringVar(value="加载中...")
         last_in_label = ttk.Label(last_clock_frame, textvariable=self.last_in_var, 
                                  font=("Arial", 10, "bold"), foreground="green")
         last_in_label.grid(row=0, column=1, sticky=tk.W, padx=(10, 0))
         
         # 最后下班时间
         ttk.Label(last_clock_frame, text="最后下班时间:", font=("Arial", 10)).grid(row=1, column=0, sticky=tk.W, pady=(5, 0))
-        self.last_out_var = tk.StringVar(value="暂无记录")
+        self.last_out_var = tk.StringVar(value="加载中...")
         last_out_label = ttk.Label(last_clock_frame, textvariable=self.last_out_var, 
                                   font=("Arial", 10, "bold"), foreground="red")
         last_out_label.grid(row=1, column=1, sticky=tk.W, padx=(10, 0), pady=(5, 0))
+        
+        # 今日工时，随每秒的时间刷新一起更新
+        ttk.Label(last_clock_frame, text="今日工时:", font=("Arial", 10)).grid(row=2, column=0, sticky=tk.W, pady=(5, 0))
+        self.today_work_var = tk.StringVar(value="加载中...")
+        today_work_label = ttk.Label(last_clock_frame, textvariable=self.today_work_var, 
+                                    font=("Arial", 10, "bold"), foreground="blue")
+        today_work_label.grid(row=2, column=1, sticky=tk.W, padx=(10, 0), pady=(5, 0))
 
     def create_settings_button(self, parent, row):
         """创建休息时间段设置按钮"""
@@ -108,7 +189,7 @@ class ClockInApp:
 
         # 刷新按钮
         self.refresh_btn = ttk.Button(button_frame, text="刷新数据", 
-                                command=self.refresh_monthly_display)
+                                command=self.refresh_display)
         self.refresh_btn.pack(side=tk.LEFT, padx=5)
     def show_check_settings(self):
         """显示查询设置窗口"""
@@ -152,7 +233,7 @@ class ClockInApp:
             year = year_var.get() if year_var.get() != '全部' else None
             month = month_var.get() if month_var.get() != '全部' else None
             settings_window.destroy()
-            self.show_monthly_records(year, month)
+            self.query_monthly_records(year, month)
 
         # 确认按钮
         confirm_btn = ttk.Button(button_frame, text="确认查询", command=confirm_query)
@@ -188,8 +269,22 @@ class ClockInApp:
                 current_date = datetime.now()
                 target_month = f"{current_date.year}-{current_date.month:02d}"
             
-            # 获取该月份的所有打卡记录
-            daily_stats = self.clock_manager.get_daily_statistics(target_month, self.rest_periods)
+            # 在后台获取该月份每天的统计
+            self.worker.submit('monthly_query', self.clock_manager.get_daily_statistics,
+                               target_month, self.rest_periods,
+                               on_done=lambda daily_stats: self.show_daily_statistics(target_month, daily_stats),
+                               status=f"正在查询 {target_month}...")
+            
+        except Exception as e:
+            self.summary_var.set("查询失败，请检查数据")
+            messagebox.showerror("错误", f"查询失败: {e}")
+
+    def show_daily_statistics(self, target_month, daily_stats):
+        """显示某月每天的统计结果"""
+        try:
+            # 清空现有数据
+            for item in self.monthly_tree.get_children():
+                self.monthly_tree.delete(item)
             
             if not daily_stats:
                 self.summary_var.set(f"{target_month} 没有找到打卡记录")
@@ -203,8 +298,8 @@ class ClockInApp:
             for day_stat in daily_stats:
                 self.monthly_tree.insert("", tk.END, values=(
                     day_stat['date'],
-                    day_stat['first_in'],
-                    day_stat['last_out'],
+                    day_stat['first_in'] or "无记录",
+                    day_stat['last_out'] or "无记录",
                     f"{day_stat['work_hours']:.2f}",
                     day_stat['remark']
                 ))
@@ -227,18 +322,40 @@ class ClockInApp:
             self.summary_var.set("查询失败，请检查数据")
             messagebox.showerror("错误", f"查询失败: {e}")
 
-    def show_monthly_records(self, year, month):
-        """显示月度打卡记录和统计数据"""
-        # 获取月度统计数据
-        stats = self.clock_manager.calculate_monthly_statistics(year, month, self.rest_periods)
-        work_days = stats.get('work_days', [])
+    @staticmethod
+    def _query_range(year, month):
+        """查询条件对应的日期半开区间和标题
+
+        指定年月为该月，只指定月份为当年的该月，只指定年份为全年，都不指定为全部记录。
+        """
+        if month and not year:
+            year = date.today().year
+        if year and month:
+            year, month = int(year), int(month)
+            next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+            return date(year, month, 1), date(next_year, next_month, 1), f"{year}年{month}月"
+        if year:
+            return date(int(year), 1, 1), date(int(year) + 1, 1, 1), f"{year}年"
+        return None, None, "全部"
+
+    def query_monthly_records(self, year, month):
+        """在后台计算所选范围的统计，完成后显示打卡记录窗口"""
+        start, end, title = self._query_range(year, month)
+        self.worker.submit('monthly_records', self.clock_manager.get_summary_totals,
+                           start, end, self.rest_periods,
+                           on_done=lambda stats: self.show_monthly_records(title, start, end, stats),
+                           on_error=lambda e: messagebox.showerror("错误", f"查询失败: {e}"),
+                           status=f"正在统计{title}...")
+
+    def show_monthly_records(self, title, start, end, stats):
+        """显示打卡记录和统计数据，记录较多时表格按需分页读取"""
         total_days = stats.get('total_days', 0)
         total_hours = stats.get('total_hours', 0.0)
         average_hours = stats.get('average_hours', 0.0)
 
         # 创建显示窗口
         display_window = tk.Toplevel(self.root)
-        display_window.title(f"{year}年{month}月打卡记录")
+        display_window.title(f"{title}打卡记录")
         display_window.geometry("600x400")
         display_window.resizable(False, False)
         display_window.transient(self.root)
@@ -251,19 +368,11 @@ class ClockInApp:
         main_frame = ttk.Frame(display_window, padding=20)
         main_frame.pack(fill=tk.BOTH, expand=True)
 
-        # 树形视图显示打卡记录
-        tree = ttk.Treeview(main_frame, columns=("日期", "工时"), show="headings")
-        tree.heading("日期", text="日期")
-        tree.heading("工时", text="工时")
-        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        # 滚动条
-        scrollbar = ttk.Scrollbar(main_frame, orient="vertical", command=tree.yview)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        tree.configure(yscroll=scrollbar.set)
-
-        # 添加数据到树形视图
-        for record in work_days:
-            tree.insert("", "end", values=(record['date'], f"{record['hours']:.2f}"))
+        # 分页表格显示打卡记录，只读取可见的行
+        table = PagedTable(main_frame, DailySummarySource(self.clock_manager, start, end), self.worker,
+                           height=12)
+        table.pack(fill=tk.BOTH, expand=True)
+        table.reload()
 
         # 统计数据
         stats_frame = ttk.Frame(display_window, padding=10)
@@ -296,38 +405,21 @@ class ClockInApp:
         stats_frame.grid(row=0, column=0, sticky=(tk.W, tk.E), pady=(0, 10))
         
         ttk.Label(stats_frame, text="本月工作日数:").grid(row=0, column=0, sticky=tk.W)
-        self.month_days_var = tk.StringVar(value="0")
+        self.month_days_var = tk.StringVar(value="加载中...")
         ttk.Label(stats_frame, textvariable=self.month_days_var, font=("Arial", 10, "bold")).grid(row=0, column=1, sticky=tk.W, padx=(5, 20))
         
         ttk.Label(stats_frame, text="总工时:").grid(row=0, column=2, sticky=tk.W)
-        self.month_total_var = tk.StringVar(value="0小时")
+        self.month_total_var = tk.StringVar(value="加载中...")
         ttk.Label(stats_frame, textvariable=self.month_total_var, font=("Arial", 10, "bold")).grid(row=0, column=3, sticky=tk.W, padx=(5, 20))
         
         ttk.Label(stats_frame, text="平均每日:").grid(row=0, column=4, sticky=tk.W)
-        self.month_avg_var = tk.StringVar(value="0小时")
+        self.month_avg_var = tk.StringVar(value="加载中...")
         ttk.Label(stats_frame, textvariable=self.month_avg_var, font=("Arial", 10, "bold")).grid(row=0, column=5, sticky=tk.W, padx=5)
         
-        # 创建Treeview显示每日详情
-        columns = ("日期", "上班时间", "下班时间", "工作时长(小时)")
-        self.daily_tree = ttk.Treeview(monthly_frame, columns=columns, show="tree headings", height=8)
-        
-        # 设置列属性
-        self.daily_tree.column("#0", width=0, stretch=tk.NO)
-        self.daily_tree.column("日期", width=100, anchor=tk.CENTER)
-        self.daily_tree.column("上班时间", width=100, anchor=tk.CENTER)
-        self.daily_tree.column("下班时间", width=100, anchor=tk.CENTER)
-        self.daily_tree.column("工作时长(小时)", width=120, anchor=tk.CENTER)
-        
-        # 设置列标题
-        for col in columns:
-            self.daily_tree.heading(col, text=col)
-        
-        # 滚动条
-        scrollbar = ttk.Scrollbar(monthly_frame, orient=tk.VERTICAL, command=self.daily_tree.yview)
-        self.daily_tree.configure(yscrollcommand=scrollbar.set)
-        
-        self.daily_tree.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-        scrollbar.grid(row=1, column=1, sticky=(tk.N, tk.S))
+        # 每日详情表格，只显示可见的行，按需分页读取本月的每日汇总
+        self.daily_source = DailySummarySource(self.clock_manager)
+        self.daily_table = PagedTable(monthly_frame, self.daily_source, self.worker, height=8)
+        self.daily_table.grid(row=1, column=0, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S))
 
     def create_status_bar(self, parent, row):
         """创建状态栏"""
@@ -339,61 +431,113 @@ class ClockInApp:
                                 relief=tk.SUNKEN, anchor=tk.W)
         status_label.pack(fill=tk.X)
 
+    def set_status(self, message):
+        """更新状态栏文字"""
+        if hasattr(self, 'status_var'):
+            self.status_var.set(message)
+
     def refresh_display(self):
-        """刷新所有显示"""
+        """刷新所有显示，重新读取当天状态以包含其他程序（如命令行）的打卡"""
+        self.load_today_state(reload=True)
         self.update_last_clock_times()
         self.refresh_monthly_display()
 
     def update_last_clock_times(self):
-        """更新最后打卡时间显示"""
-        last_in = self.clock_manager.get_last_clock_in()
-        last_out = self.clock_manager.get_last_clock_out()
+        """在后台查询最后打卡时间并更新显示"""
+        self.worker.submit('last_clock', self._load_last_clock_times,
+                           on_done=self.show_last_clock_times, status="正在读取最后打卡时间...")
+
+    def _load_last_clock_times(self):
+        """查询最后一次上班和下班记录（在后台线程执行）"""
+        return self.clock_manager.get_last_clock_in(), self.clock_manager.get_last_clock_out()
+
+    def show_last_clock_times(self, last_clock):
+        """显示最后打卡时间"""
+        last_in, last_out = last_clock
         print(f"最后上班记录: {last_in}, 最后下班记录: {last_out}") 
         
         if last_in:
-            self.last_in_var.set(f"{last_in['time']}")
+            self.last_in_var.set(f"{last_in.time}")
         else:
             self.last_in_var.set("暂无记录")
         
         if last_out:
-            self.last_out_var.set(f"{last_out['time']}")
+            self.last_out_var.set(f"{last_out.time}")
         else:
             self.last_out_var.set("暂无记录")
+        self._startup_done('last_clock')
 
     def refresh_monthly_display(self):
-        """刷新本月统计显示"""
+        """在后台计算本月统计并刷新显示"""
+        self.worker.submit('monthly_display', self.clock_manager.calculate_monthly_statistics,
+                           None, None, self.rest_periods,
+                           on_done=self.show_monthly_display, status="正在计算本月统计...")
+
+    def show_monthly_display(self, monthly_stats):
+        """显示本月统计"""
         try:
-            # 清空现有记录
-            for item in self.daily_tree.get_children():
-                self.daily_tree.delete(item)
-            
-            # 计算本月统计数据
-            monthly_stats = self.clock_manager.calculate_monthly_statistics(rest_periods=self.rest_periods)
-            
             # 更新统计信息
-            self.month_days_var.set(str(monthly_stats['total_days']))
-            self.month_total_var.set(f"{monthly_stats['total_hours']:.2f}小时")
-            self.month_avg_var.set(f"{monthly_stats['average_hours']:.2f}小时")
+            year, month = monthly_stats['year'], monthly_stats['month']
+            self._month_state = (year, month, monthly_stats['total_days'],
+                                 round(monthly_stats['total_hours'] * 3600))
+            self.show_month_totals()
             
-            # 显示每日详情
-            for work_day in monthly_stats['work_days']:
-                # 获取当天的上班下班时间
-                records = work_day['records']
-                in_times = [r['time'] for r in records if r['type'] == 'in']
-                out_times = [r['time'] for r in records if r['type'] == 'out']
-                
-                first_in = in_times[0] if in_times else "无记录"
-                last_out = out_times[-1] if out_times else "无记录"
-                
-                self.daily_tree.insert("", tk.END, values=(
-                    work_day['date'],
-                    first_in,
-                    last_out,
-                    f"{work_day['hours']:.2f}"
-                ))
+            # 每日详情表格切换到统计的月份并重新读取第一页
+            self.daily_source.start, self.daily_source.end, _ = self._query_range(year, month)
+            self.daily_table.reload(on_loaded=lambda: self._startup_done('monthly_display'))
         except Exception as e:
             print(f"刷新本月统计显示时出错: {e}")
 
+    def show_month_totals(self):
+        """根据 _month_state 显示本月工作天数、总工时和平均工时"""
+        _, _, total_days, net_seconds = self._month_state
+        total_hours = net_seconds / 3600
+        self.month_days_var.set(str(total_days))
+        self.month_total_var.set(f"{total_hours:.2f}小时")
+        self.month_avg_var.set(f"{total_hours / total_days if total_days > 0 else 0.0:.2f}小时")
+
+    def apply_day_change(self, change):
+        """把一次打卡对当天汇总的影响增量应用到本月统计和每日详情表格，不重新计算整月"""
+        if self._month_state is None:
+            self.request_refresh()
+            return
+        year, month, total_days, net_seconds = self._month_state
+        changed = day_to_date(change.day)
+        if (changed.year, changed.month) != (year, month):
+            return
+        self._month_state = (year, month, total_days + change.work_days_delta,
+                             net_seconds + change.net_delta)
+        self.show_month_totals()
+
+        # 行已存在且排序位置不变时原地更新，新增、移除或位置变化时重新读取表格
+        before, after = change.before, change.after
+        order_by = self.daily_table.sort_column
+        key = self.daily_source.key(after, order_by)
+        if (before is not None and before.net_seconds > 0 and after.net_seconds > 0
+                and self.daily_source.key(before, order_by) == key):
+            self.daily_table.update_row(key, self.daily_source.format_row(after))
+        else:
+            self.schedule_table_reload()
+
+    def request_refresh(self):
+        """请求在后台重新计算本月统计，短时间内的多次请求合并为一次"""
+        self._schedule('monthly_display', self.refresh_monthly_display)
+
+    def schedule_table_reload(self):
+        """请求重新读取每日详情表格，短时间内的多次请求合并为一次"""
+        self._schedule('table_reload', self.daily_table.reload)
+
+    def _schedule(self, name, func):
+        """REFRESH_DELAY 毫秒后执行 func，期间同名的请求被合并"""
+        if name in self._scheduled:
+            return
+
+        def run():
+            del self._scheduled[name]
+            func()
+
+        self._scheduled[name] = self.root.after(self.REFRESH_DELAY, run)
+
 
 
 
@@ -506,10 +650,10 @@ class ClockInApp:
         
         # 验证时间格式
         try:
-            start_dt = datetime.strptime(start_time, "%H:%M")
-            end_dt = datetime.strptime(end_time, "%H:%M")
+            start_minutes = parse_hhmm(start_time)
+            end_minutes = parse_hhmm(end_time)
             
-            if start_dt >= end_dt:
+            if start_minutes >= end_minutes:
                 messagebox.showwarning("警告", "开始时间必须早于结束时间！")
                 return
                 
@@ -518,7 +662,7 @@ class ClockInApp:
             return
         
         # 计算时长（分钟）
-        duration = (end_dt - start_dt).seconds // 60
+        duration = end_minutes - start_minutes
         
         # 添加到数据列表
         self.rest_periods.append({
@@ -588,7 +732,7 @@ class ClockInApp:
             messagebox.showinfo("成功", "休息时间段设置已保存！")
             self.rest_window.destroy()
             self.update_rest_count()
-            self.refresh_monthly_display()
+            self.request_refresh()
         else:
             messagebox.showerror("错误", "保存失败！")
 
@@ -727,17 +871,23 @@ class ClockInApp:
                 messagebox.showwarning("警告", "请选择年份！")
                 return
             
+            # 在后台获取统计信息
+            self.worker.submit('monthly_statistics', self.clock_manager.get_monthly_statistics,
+                               year if year else None,
+                               month if month != '全部' else None,
+                               self.rest_periods,
+                               on_done=self.show_monthly_statistics, status="正在查询月份统计...")
+            
+        except Exception as e:
+            messagebox.showerror("错误", f"查询失败: {e}")
+
+    def show_monthly_statistics(self, monthly_stats):
+        """显示月份统计结果"""
+        try:
             # 清空现有数据
             for item in self.monthly_tree.get_children():
                 self.monthly_tree.delete(item)
             
-            # 获取统计信息
-            monthly_stats = self.clock_manager.get_monthly_statistics(
-                year if year else None, 
-                month if month != '全部' else None,
-                self.rest_periods
-            )
-            
             if not monthly_stats:
                 messagebox.showinfo("提示", "没有找到相关统计信息！")
                 return
@@ -755,37 +905,36 @@ class ClockInApp:
             messagebox.showinfo("完成", f"共找到 {len(monthly_stats)} 个月的统计信息")
             
         except Exception as e:
-            messagebox.showerror("错误", f"查询失败: {e}")
+            messagebox.showerror("错误", f"显示统计失败: {e}")
 
     def refresh_monthly_statistics(self):
         """刷新月份统计"""
         self.query_monthly_statistics()
 
     def export_monthly_statistics(self):
-        """导出月份统计到CSV文件"""
-        try:
-            # 获取当前显示的数据
-            items = self.monthly_tree.get_children()
-            if not items:
-                messagebox.showwarning("警告", "没有数据可导出！")
-                return
-            
-            filename = f"月度统计_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-            
-            with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.writer(csvfile)
-                # 写入表头
-                writer.writerow(["月份", "工作日数", "总工时(小时)", "平均每日工时(小时)", "备注"])
-                
-                # 写入数据
-                for item in items:
-                    values = self.monthly_tree.item(item)['values']
-                    writer.writerow(values)
-            
-            messagebox.showinfo("成功", f"统计信息已导出到: {filename}")
-            
-        except Exception as e:
-            messagebox.showerror("错误", f"导出失败: {e}")
+        """在后台把所选范围的月份统计直接从数据库导出到CSV文件"""
+        year = self.year_var.get()
+        month = self.month_var.get()
+        if not year and month != '全部':
+            messagebox.showwarning("警告", "请选择年份！")
+            return
+        
+        start, end, _ = self._query_range(year, month if month != '全部' else None)
+        filename = f"月度统计_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        # 每次导出都写不同的文件，key 为 None 不会被后一次导出取代，各自的完成提示都会显示
+        self.worker.submit(None, self.clock_manager.export, filename, 'monthly', 'csv', start, end,
+                           self.rest_periods, None,
+                           lambda count: self.worker.progress(f"正在导出... 已写入 {count} 行"),
+                           on_done=lambda count: self.on_export_done(filename, count),
+                           on_error=lambda e: messagebox.showerror("错误", f"导出失败: {e}"),
+                           status="正在导出月份统计...")
+
+    def on_export_done(self, filename, count):
+        """导出完成后提示"""
+        if count == 0:
+            messagebox.showwarning("警告", f"没有数据可导出，已生成空文件: {filename}")
+        else:
+            messagebox.showinfo("成功", f"统计信息已导出到: {filename}（{count} 行）")
 
     def create_monthly_statistics_tab(self, tab_control):
         """创建月份统计标签页"""
@@ -826,6 +975,10 @@ class ClockInApp:
         refresh_btn = ttk.Button(button_frame, text="刷新", command=self.refresh_monthly_statistics)
         refresh_btn.grid(row=0, column=1, padx=5)
         
+        # 导出按钮，在后台导出并在状态栏显示进度
+        export_btn = ttk.Button(button_frame, text="导出CSV", command=self.export_monthly_statistics)
+        export_btn.grid(row=0, column=2, padx=5)
+        
         # 统计结果显示区域 - 第2行
         stats_frame = ttk.LabelFrame(main_frame, text="月份统计结果", padding=10)
         stats_frame.grid(row=2, column=0, sticky=tk.NSEW, padx=5, pady=5)
@@ -877,21 +1030,53 @@ class ClockInApp:
         """更新时间显示"""
         now = datetime.now()
         self.date_var.set(f"当前日期: {now.strftime('%Y年%m月%d日 %H:%M:%S %A')}")
+        self.update_today_work_display()
         self.root.after(1000, self.update_time_display)
     
+    def update_today_work_display(self):
+        """更新今日工时计时（使用内存中的当天状态，不查询数据库）
+
+        当天状态尚未载入或跨过了午夜时交给后台线程载入，载入完成后再显示。
+        """
+        if self._painted_at is None:
+            return
+        try:
+            result = self.clock_manager.get_today_work_seconds(self.rest_periods)
+            if result is None:
+                self.load_today_state()
+                return
+            worked, net = result
+            self.today_work_var.set(f"{format_duration(worked)}（扣除休息 {format_duration(net)}）")
+        except Exception as e:
+            print(f"更新今日工时出错: {e}")
+    
     def clock_in(self):
         """上班打卡"""
-        if self.clock_manager.clock_in("快速上班打卡"):
-            self.refresh_display()
-        else:
-            messagebox.showerror("错误", "打卡失败！")
+        self.worker.submit(None, self._punch, self.clock_manager.clock_in, "快速上班打卡",
+                           on_done=lambda result: self.on_clock_done(result, "打卡失败！"),
+                           on_error=lambda e: messagebox.showerror("错误", f"打卡失败: {e}"), status="正在打卡...")
     
     def clock_out(self):
         """下班打卡"""
-        if self.clock_manager.clock_out("快速下班打卡"):
-            self.refresh_display()
+        self.worker.submit(None, self._punch, self.clock_manager.clock_out, "快速下班打卡",
+                           on_done=lambda result: self.on_clock_done(result, "打卡失败！"),
+                           on_error=lambda e: messagebox.showerror("错误", f"打卡失败: {e}"), status="正在打卡...")
+
+    def _punch(self, func, *args):
+        """执行打卡并读取最后打卡时间（在后台线程执行），返回 (当天汇总的变化, 最后打卡时间)"""
+        change = func(*args)
+        if change is None:
+            return None, None
+        return change, self._load_last_clock_times()
+
+    def on_clock_done(self, result, error_message):
+        """打卡完成后只更新受影响的日期和本月合计，失败时提示"""
+        change, last_clock = result
+        if change is not None:
+            self.show_last_clock_times(last_clock)
+            self.apply_day_change(change)
         else:
-            messagebox.showerror("错误", "打卡失败！")
+            messagebox.showerror("错误", error_message)
 
     def custom_clock(self):
         """自定义时间打卡"""
@@ -909,7 +1094,7 @@ class ClockInApp:
 
         try:
             # 尝试解析时间，验证格式是否正确
-            datetime.strptime(custom_time, "%Y-%m-%d %H:%M:%S")
+            parse_datetime(custom_time)
         except ValueError:
             messagebox.showwarning("警告", "时间格式不正确！请使用 YYYY-MM-DD HH:MM:SS 格式")
             return
@@ -923,7 +1108,7 @@ class ClockInApp:
             messagebox.showwarning("警告", "请输入时间！")
             return
         
-        if self.clock_manager.custom_clock(custom_time, record_type, notes):
-            self.refresh_display()
-        else:
-            messagebox.showerror("错误", "打卡失败！请检查时间格式")
\ No newline at end of file
+        self.worker.submit(None, self._punch, self.clock_manager.custom_clock, custom_time, record_type, notes,
+                           on_done=lambda result: self.on_clock_done(result, "打卡失败！请检查时间格式"),
+                           on_error=lambda e: messagebox.showerror("错误", f"打卡失败: {e}"),
+                           status="正在打卡...")
\ No newline at end of file
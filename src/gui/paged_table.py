@@ -0,0 +1,240 @@
+"""
+虚拟化分页表格
+"""
+import tkinter as tk
+from tkinter import ttk
+
+
+class DailySummarySource:
+    """PagedTable 的数据源：某段日期内有工时的每日汇总
+
+    start / end 为日期半开区间 [start, end)，为 None 时不限制。
+    """
+    columns = (
+        ('date', "日期", 100),
+        ('first_in', "上班时间", 150),
+        ('last_out', "下班时间", 150),
+        ('hours', "工作时长(小时)", 120),
+    )
+
+    def __init__(self, clock_manager, start=None, end=None):
+        self.clock_manager = clock_manager
+        self.start = start
+        self.end = end
+
+    def count(self) -> int:
+        """范围内的行数"""
+        return self.clock_manager.get_summary_totals(self.start, self.end)['total_days']
+
+    def fetch(self, order_by: str, descending: bool, after=None, before=None,
+              limit: int = 100, offset: int = 0) -> list:
+        """读取一页，返回 [(键, 列值), ...]"""
+        return [(key, self.format_row(summary)) for key, summary in self.clock_manager.get_summary_page(
+            self.start, self.end, order_by, descending, after, before, limit, offset)]
+
+    @staticmethod
+    def key(summary, order_by: str) -> tuple:
+        """每日汇总按 order_by 排序时的键，与 fetch 返回的键一致"""
+        if order_by == 'date':
+            value = summary.day
+        elif order_by == 'hours':
+            value = summary.net_seconds
+        else:
+            ts = summary.first_in_ts if order_by == 'first_in' else summary.last_out_ts
+            value = None if ts is None else ts - summary.day * 86400
+        return value, summary.day
+
+    @staticmethod
+    def format_row(summary) -> tuple:
+        """每日汇总转换为表格的一行"""
+        return (summary.date, summary.first_in or "无记录", summary.last_out or "无记录",
+                f"{summary.hours:.2f}")
+
+
+class PagedTable(ttk.Frame):
+    """只显示可见行的表格
+
+    Treeview 中最多只有 height 个条目，滚动时原地改写这些条目的内容，数据再多也不会插入
+    大量 Tk 条目。数据按页从 source 读取：顺序滚动时用上一页首尾行的键做键集分页，
+    拖动滚动条跳到缓存之外时才按位置读取；内存中最多缓存 max_buffer 行。
+    点击列标题按该列排序（再次点击切换升降序），只重新读取第一页。
+
+    source 需要提供 columns（(列名, 标题, 宽度) 列表）、count() 和
+    fetch(order_by, descending, after, before, limit, offset)。查询都通过 worker 在后台线程执行，
+    主线程只处理缓存中的行；滚动到尚未读取的位置时，读取完成后再显示。
+    """
+
+    def __init__(self, parent, source, worker, height: int = 15, page_size: int = 100, max_buffer: int = 500):
+        super().__init__(parent)
+        self.source = source
+        self.worker = worker
+        self.height = height
+        self.page_size = max(page_size, height)
+        self.max_buffer = max(max_buffer, self.page_size * 2)
+        self.sort_column = source.columns[0][0]
+        self.descending = False
+
+        # 缓存的行 [(键, 列值), ...]，_base 为 _rows[0] 在全部数据中的位置，_top 为第一个可见行的位置
+        self._rows = []
+        self._base = 0
+        self._top = 0
+        self._total = 0
+        self._items = []
+        # 后台任务的 key：新的读取取代尚未完成的旧读取；重新读取期间不发起翻页
+        self._task_key = ('paged_table', id(self))
+        self._reloading = False
+
+        column_ids = [column for column, _, _ in source.columns]
+        self.tree = ttk.Treeview(self, columns=column_ids, show="headings", height=height)
+        for column, heading, width in source.columns:
+            self.tree.heading(column, text=heading, command=lambda c=column: self.sort_by(c))
+            self.tree.column(column, width=width, anchor=tk.CENTER)
+
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(0, weight=1)
+
+        self.tree.bind('<MouseWheel>', lambda e: self.scroll(-3 if e.delta > 0 else 3))
+        self.tree.bind('<Button-4>', lambda e: self.scroll(-3))
+        self.tree.bind('<Button-5>', lambda e: self.scroll(3))
+        self.tree.bind('<Prior>', lambda e: self.scroll(-self.height))
+        self.tree.bind('<Next>', lambda e: self.scroll(self.height))
+
+    def reload(self, on_loaded=None):
+        """数据变化后在后台重新读取，保持当前排序并回到第一行；读取并显示后调用 on_loaded()"""
+        self._reloading = True
+        self.worker.submit(self._task_key, self._load_first_page, self.sort_column, self.descending,
+                           on_done=lambda result: self._on_reloaded(result, on_loaded),
+                           status="正在读取表格...")
+
+    def _load_first_page(self, sort_column: str, descending: bool) -> tuple:
+        """读取总行数和第一页（在后台线程执行）"""
+        return self.source.count(), self.source.fetch(sort_column, descending, limit=self.page_size)
+
+    def _on_reloaded(self, result, on_loaded=None):
+        if not self.winfo_exists():
+            return
+        self._reloading = False
+        self._total, self._rows = result
+        self._base = 0
+        self._top = 0
+        self._render()
+        if on_loaded:
+            on_loaded()
+
+    def update_row(self, key, values) -> bool:
+        """原地更新缓存中键为 key 的行，不重新查询；该行不在缓存中时返回 False
+
+        只适用于排序键和总行数都不变的修改，否则应调用 reload()。
+        """
+        for index, (row_key, _) in enumerate(self._rows):
+            if row_key == key:
+                self._rows[index] = (key, values)
+                visible = self._base + index - self._top
+                if 0 <= visible < len(self._items):
+                    self.tree.item(self._items[visible], values=values)
+                return True
+        return False
+
+    def sort_by(self, column: str):
+        """按列排序"""
+        if column == self.sort_column:
+            self.descending = not self.descending
+        else:
+            self.sort_column = column
+            self.descending = False
+        for column_id, heading, _ in self.source.columns:
+            arrow = (" ▼" if self.descending else " ▲") if column_id == self.sort_column else ""
+            self.tree.heading(column_id, text=heading + arrow)
+        self.reload()
+
+    def scroll(self, rows: int):
+        """滚动若干行"""
+        self.scroll_to(self._top + rows)
+        return "break"
+
+    def scroll_to(self, top: int):
+        """滚动到第 top 行，所需的行不在缓存中时先在后台读取"""
+        top = max(0, min(top, self._total - self.height))
+        self._top = top
+        if self._reloading:
+            return
+        if self._is_loaded(top):
+            self._render()
+            return
+        self._update_scrollbar()
+        self.worker.submit(self._task_key, self._load_window, list(self._rows), self._base,
+                           self.sort_column, self.descending, top,
+                           on_done=lambda result: self._on_window_loaded(top, result), status="正在读取表格...")
+
+    def _on_scrollbar(self, action, *args):
+        if action == 'moveto':
+            self.scroll_to(int(float(args[0]) * self._total))
+        elif action == 'scroll':
+            step = self.height if args[1] == 'pages' else 1
+            self.scroll(int(args[0]) * step)
+
+    def _is_loaded(self, top: int) -> bool:
+        """[top, top + height) 内的行是否都在缓存中"""
+        end = min(top + self.height, self._total)
+        return self._base <= top and end <= self._base + len(self._rows)
+
+    def _on_window_loaded(self, top: int, result):
+        if not self.winfo_exists() or self._reloading:
+            return
+        self._rows, self._base = result
+        if self._top != top and not self._is_loaded(self._top):
+            # 读取期间又滚动到了缓存之外
+            self.scroll_to(self._top)
+        else:
+            self._render()
+
+    def _load_window(self, rows: list, base: int, sort_column: str, descending: bool, top: int) -> tuple:
+        """在缓存副本的基础上读取 [top, top + height) 内的行，返回新的 (缓存, 起始位置)（在后台线程执行）"""
+        end = min(top + self.height, self._total)
+        buffer_end = base + len(rows)
+        if not rows or top >= buffer_end + self.page_size or end <= base - self.page_size:
+            # 离缓存太远（拖动滚动条跳转），按位置读取一页
+            return self.source.fetch(sort_column, descending, limit=self.page_size, offset=top), top
+
+        while base + len(rows) < end:
+            page = self.source.fetch(sort_column, descending, after=rows[-1][0], limit=self.page_size)
+            if not page:
+                break
+            rows.extend(page)
+            overflow = len(rows) - self.max_buffer
+            if overflow > 0 and top - base >= overflow:
+                del rows[:overflow]
+                base += overflow
+
+        while top < base:
+            page = self.source.fetch(sort_column, descending, before=rows[0][0], limit=self.page_size)
+            if not page:
+                base = 0
+                break
+            rows[:0] = page
+            base -= len(page)
+            overflow = len(rows) - self.max_buffer
+            if overflow > 0:
+                del rows[-overflow:]
+        return rows, base
+
+    def _render(self):
+        """把可见窗口内的行写入 Treeview 的固定条目"""
+        start = self._top - self._base
+        visible = self._rows[start:start + self.height] if start >= 0 else []
+        while len(self._items) < len(visible):
+            self._items.append(self.tree.insert("", tk.END))
+        while len(self._items) > len(visible):
+            self.tree.delete(self._items.pop())
+        for item, (_, values) in zip(self._items, visible):
+            self.tree.item(item, values=values)
+        self._update_scrollbar()
+
+    def _update_scrollbar(self):
+        if self._total > 0:
+            self.scrollbar.set(self._top / self._total, min(1.0, (self._top + self.height) / self._total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
@@ -0,0 +1,117 @@
+"""
+后台任务执行
+"""
+import itertools
+import queue
+import threading
+
+
+class BackgroundWorker:
+    """在后台线程中执行数据库读写和统计计算，Tk 主线程通过 root.after 轮询结果
+
+    任务按提交顺序在同一个后台线程中依次执行，数据库访问不会并发。
+    提交时可指定 key：同一 key 提交了新任务后，尚未开始的旧任务直接跳过，
+    已在执行的旧任务结果被丢弃，只回调最新一次的结果。key 为 None 的任务（如打卡）不会被取代。
+    回调总是在 Tk 主线程中执行，可以直接操作控件。
+    """
+    # 轮询结果队列的间隔（毫秒），约 60 fps
+    POLL_INTERVAL = 16
+
+    def __init__(self, root, on_status=None):
+        self.root = root
+        # 状态栏文字回调，在主线程中调用
+        self.on_status = on_status
+        self._requests = queue.Queue()
+        self._results = queue.Queue()
+        # key -> 最新任务序号，只在主线程中写入
+        self._latest = {}
+        self._sequence = itertools.count(1)
+        self._pending = 0
+        self._polling = False
+        self._thread = threading.Thread(target=self._run, name="BackgroundWorker", daemon=True)
+        self._thread.start()
+
+    def submit(self, key, func, *args, on_done=None, on_error=None, status: str = "处理中...") -> int:
+        """提交任务，返回任务序号
+
+        on_done(result) / on_error(exception) 在主线程中回调；status 显示在状态栏。
+        """
+        seq = next(self._sequence)
+        if key is not None:
+            self._latest[key] = seq
+        self._pending += 1
+        self._requests.put((key, seq, func, args, on_done, on_error, status))
+        self._show_status(status)
+        self._schedule_poll()
+        return seq
+
+    def progress(self, message: str):
+        """在后台任务中报告进度，状态栏会在主线程中更新"""
+        self._results.put(('progress', message))
+
+    def stop(self):
+        """停止后台线程（已提交的任务执行完后退出）"""
+        self._requests.put(None)
+
+    def _is_stale(self, key, seq) -> bool:
+        """是否已被同一 key 的新任务取代"""
+        return key is not None and self._latest.get(key) != seq
+
+    def _run(self):
+        """后台线程：依次执行任务，结果放入结果队列"""
+        while True:
+            task = self._requests.get()
+            if task is None:
+                break
+            key, seq, func, args, on_done, on_error, status = task
+            if self._is_stale(key, seq):
+                self._results.put(('skipped', key, seq))
+                continue
+            self._results.put(('progress', status))
+            try:
+                result = func(*args)
+            except Exception as e:
+                self._results.put(('error', key, seq, e, on_error))
+            else:
+                self._results.put(('done', key, seq, result, on_done))
+
+    def _schedule_poll(self):
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.POLL_INTERVAL, self._poll)
+
+    def _poll(self):
+        """主线程：取出已完成的结果并回调，还有未完成的任务时继续轮询"""
+        self._polling = False
+        while True:
+            try:
+                message = self._results.get_nowait()
+            except queue.Empty:
+                break
+            kind = message[0]
+            if kind == 'progress':
+                self._show_status(message[1])
+                continue
+
+            self._pending -= 1
+            if kind == 'skipped':
+                continue
+            _, key, seq, value, callback = message
+            if self._is_stale(key, seq):
+                continue
+            try:
+                if callback:
+                    callback(value)
+                elif kind == 'error':
+                    print(f"后台任务失败: {value}")
+            except Exception as e:
+                print(f"处理后台任务结果出错: {e}")
+
+        if self._pending > 0:
+            self._schedule_poll()
+        else:
+            self._show_status("就绪")
+
+    def _show_status(self, message: str):
+        if self.on_status and message:
+            self.on_status(message if self._pending <= 1 else f"{message}（{self._pending} 个任务）")
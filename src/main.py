@@ -2,6 +2,11 @@
 """
 打卡机应用 - 主程序入口
 """
+import time
+
+# 启动计时起点，在导入 Tk 和界面模块之前记录
+STARTED_AT = time.perf_counter()
+
 import sys
 import os
 import tkinter as tk
@@ -22,7 +27,7 @@ def main():
         
         # 创建主窗口
         root = tk.Tk()
-        app = ClockInApp(root, config)
+        app = ClockInApp(root, config, started_at=STARTED_AT)
         
         # 启动应用
         root.mainloop()
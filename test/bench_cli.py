@@ -0,0 +1,46 @@
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# 命令行入口的启动到退出耗时：登录脚本在大量机器上调用 punch，必须足够快
+CLI = os.path.join(os.path.dirname(__file__), '..', 'src', 'cli.py')
+RUNS = 20
+
+
+def measure(args, cwd):
+    """多次运行命令，返回每次启动到退出的耗时（毫秒）"""
+    times = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        result = subprocess.run(args, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append((time.perf_counter() - start) * 1000)
+        assert result.returncode == 0, args
+    return times
+
+
+with tempfile.TemporaryDirectory() as tmp_dir:
+    db_path = os.path.join(tmp_dir, "clock_in.db")
+    # 先建好数据库，之后每次运行都是已是最新 schema 的热启动
+    subprocess.run([sys.executable, CLI, '--db', db_path, 'punch', 'in', '--at', '2025-09-01 09:00:00'],
+                   check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    # 命令行入口不能导入 Tk 和界面模块
+    check = ("import sys; sys.path.insert(0, sys.argv[1]); import cli; "
+             "assert not any(name == 'tkinter' or name.startswith('gui') for name in sys.modules)")
+    subprocess.run([sys.executable, '-c', check, os.path.dirname(CLI)], check=True)
+
+    cases = [
+        ("python 空进程", [sys.executable, '-c', 'pass']),
+        ("punch in --at", [sys.executable, CLI, '--db', db_path, 'punch', 'in', '--at', '08:30:00']),
+        ("punch out", [sys.executable, CLI, '--db', db_path, 'punch', 'out']),
+        ("stats month", [sys.executable, CLI, '--db', db_path, 'stats', 'month', '2025-09']),
+    ]
+    results = {name: measure(args, tmp_dir) for name, args in cases}
+
+baseline = statistics.median(results["python 空进程"])
+for name, times in results.items():
+    median = statistics.median(times)
+    print(f"{name}: 中位数 {median:.1f}ms, 最大 {max(times):.1f}ms, 比空进程多 {median - baseline:.1f}ms ({RUNS} 次)")
@@ -0,0 +1,54 @@
+import os
+import re
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+# 添加src目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.timestamp import parse_timestamp, parse_date, date_to_day, format_ts
+
+EPOCH = datetime(1970, 1, 1)
+
+
+# 原实现：strptime 解析，失败时用正则补零后重试
+def old_parse_timestamp(record_time):
+    try:
+        dt = datetime.strptime(record_time, "%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        m = re.match(r"(\d{4})-(\d{1,2})-(\d{1,2}) (\d{1,2}):(\d{1,2}):(\d{1,2})", record_time.strip())
+        if not m:
+            raise
+        year, month, day, hour, minute, second = m.groups()
+        dt = datetime.strptime(
+            f"{year}-{month.zfill(2)}-{day.zfill(2)} {hour.zfill(2)}:{minute.zfill(2)}:{second.zfill(2)}",
+            "%Y-%m-%d %H:%M:%S")
+    return (dt - EPOCH) // timedelta(seconds=1)
+
+
+def old_date_to_day(date_str):
+    return (datetime.strptime(date_str, "%Y-%m-%d") - EPOCH).days
+
+
+canonical = [format_ts(1700000000 + i * 3607) for i in range(10000)]
+legacy = [f"2025-{i % 12 + 1}-{i % 28 + 1} {i % 24}:{i % 60}:{i % 60}" for i in range(10000)]
+dates = [value[:10] for value in canonical]
+
+# 新旧实现结果必须一致
+for value in canonical + legacy:
+    assert parse_timestamp(value) == old_parse_timestamp(value), value
+for value in dates:
+    assert date_to_day(value) == old_date_to_day(value), value
+assert parse_date("2025-9-5").isoformat() == "2025-09-05"
+
+cases = [
+    ("标准格式时间戳", old_parse_timestamp, parse_timestamp, canonical),
+    ("未补零格式时间戳", old_parse_timestamp, parse_timestamp, legacy),
+    ("日期转天数", old_date_to_day, date_to_day, dates),
+]
+for name, old, new, values in cases:
+    old_time = min(timeit.repeat(lambda: [old(v) for v in values], number=1, repeat=5))
+    new_time = min(timeit.repeat(lambda: [new(v) for v in values], number=1, repeat=5))
+    print(f"{name}: 原实现 {old_time * 1e3:.1f}ms, 新实现 {new_time * 1e3:.1f}ms, "
+          f"加速 {old_time / new_time:.1f}x ({len(values)} 条)")
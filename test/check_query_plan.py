@@ -0,0 +1,63 @@
+import os
+import sys
+import tempfile
+
+# 添加src目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.database import DatabaseManager
+
+# 在临时数据库中检查月度查询的执行计划
+with tempfile.TemporaryDirectory() as tmp_dir:
+    db = DatabaseManager(os.path.join(tmp_dir, "clock_in.db"))
+    db.add_clock_records_bulk(
+        (f"2025-{month:02d}-{day:02d} {hour}:00:00", record_type)
+        for month in range(1, 13) for day in range(1, 29) for hour, record_type in ((9, "in"), (18, "out"))
+    )
+    db.get_connection().execute("ANALYZE")
+
+    plan = db.explain_monthly_query(2025, 9)
+    print("月度查询执行计划:")
+    for detail in plan:
+        print("  ", detail)
+
+    # 每日汇总按各列排序分页（第一页和之后的键集翻页）的执行计划
+    conn = db.get_connection()
+    statements = []
+    conn.set_trace_callback(statements.append)
+    for column in db.SUMMARY_SORT_COLUMNS:
+        for descending in (False, True):
+            page = db.get_summary_page(None, None, column, descending, limit=20)
+            db.get_summary_page(None, None, column, descending, after=page[-1][0], limit=20)
+    conn.set_trace_callback(None)
+    page_plans = [[row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql)] for sql in statements]
+
+    # 每天首末打卡时间的查询（范围统计、汇总重建、批量统计）按员工和日期排序的执行计划
+    bounds_plans = [[row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + db.DAY_BOUNDS_SQL.format(where=where),
+                                                    params)]
+                    for where, params in (
+                        ("", ()),
+                        ("WHERE employee_id = ? AND record_day >= ? AND record_day < ?", ('default', 0, 100000)),
+                        ("WHERE employee_id IN (?, ?) AND record_day >= ? AND record_day < ?",
+                         ('default', 'other', 0, 100000)),
+                    )]
+
+    db.close()
+
+# 必须是索引范围扫描，不能全表扫描，也不需要额外排序
+assert any("idx_day_cover" in detail and "record_day>?" in detail for detail in plan), plan
+assert not any(detail.startswith("SCAN clock_records") for detail in plan), plan
+assert not any("TEMP B-TREE" in detail for detail in plan), plan
+print("OK: 月度查询使用 idx_day_cover 范围扫描")
+
+# 每日汇总分页按任何列排序都走索引，不需要临时排序
+assert len(page_plans) == len(DatabaseManager.SUMMARY_SORT_COLUMNS) * 4, page_plans
+for page_plan in page_plans:
+    assert not any("TEMP B-TREE" in detail for detail in page_plan), page_plan
+print("OK: 每日汇总分页按各列排序均使用索引")
+
+# 每天首末打卡时间按员工和日期有序返回，排序由 idx_day_cover 直接提供
+for bounds_plan in bounds_plans:
+    assert any("idx_day_cover" in detail for detail in bounds_plan), bounds_plan
+    assert not any("TEMP B-TREE" in detail for detail in bounds_plan), bounds_plan
+print("OK: 每日首末打卡查询按索引顺序返回")
@@ -0,0 +1,60 @@
+import os
+import random
+import sys
+import tempfile
+from datetime import date, timedelta
+
+# 添加src目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.clock_manager import ClockManager
+from core.database import DatabaseManager
+from core.vectorized import compute_work_statistics, has_numpy
+
+REST_PERIODS = [
+    {'start': '12:00', 'end': '13:00'},
+    {'start': '18:00', 'end': '18:30'},
+]
+
+random.seed(12)
+records = []
+day = date(2024, 1, 1)
+while day < date(2025, 7, 1):
+    kind = random.random()
+    if kind < 0.7:
+        # 正常的一天
+        records.append((f"{day} 0{random.randint(7, 9)}:{random.randint(0, 59):02d}:00", "in"))
+        records.append((f"{day} {random.randint(16, 21)}:{random.randint(0, 59):02d}:00", "out"))
+    elif kind < 0.8:
+        # 只有上班或只有下班
+        records.append((f"{day} 09:00:00", random.choice(("in", "out"))))
+    elif kind < 0.85:
+        # 下班早于上班
+        records.append((f"{day} 18:00:00", "in"))
+        records.append((f"{day} 09:00:00", "out"))
+    day += timedelta(days=1)
+
+# 在临时数据库中比较 NumPy、纯 Python 和月度汇总三种计算结果
+with tempfile.TemporaryDirectory() as tmp_dir:
+    db = DatabaseManager(os.path.join(tmp_dir, "clock_in.db"))
+    db.add_clock_records_bulk(records)
+    clock_manager = ClockManager(db=db)
+
+    python_result = compute_work_statistics(db, rest_periods=REST_PERIODS, use_numpy=False)
+    if has_numpy():
+        numpy_result = compute_work_statistics(db, rest_periods=REST_PERIODS, use_numpy=True)
+        assert numpy_result == python_result, "NumPy 与纯 Python 结果不一致"
+        print("OK: NumPy 与纯 Python 结果一致")
+    else:
+        print("未安装 NumPy，只检查纯 Python 实现")
+
+    for year, month, work_days, net_seconds in python_result['monthly']:
+        statistics = clock_manager.calculate_monthly_statistics(year, month, REST_PERIODS)
+        assert statistics['total_days'] == work_days, (year, month)
+        assert abs(statistics['total_hours'] - net_seconds / 3600) < 1e-9, (year, month)
+
+    rollups = clock_manager.db.get_monthly_rollups()
+    assert [row for row in python_result['monthly'] if row[2]] == [row for row in rollups if row[2]], rollups
+    db.close()
+
+print(f"OK: 与 calculate_monthly_statistics 一致（{len(python_result['monthly'])} 个月）")